@@ -0,0 +1,180 @@
+import argparse
+import json
+import time
+
+import tensorflow as tf
+
+from gans.callbacks import basic_callbacks
+from gans.datasets import dataset_factory
+from gans.datasets import problem_type
+from gans.models import model_factories
+from gans.trainers import conditional_gan_trainer
+from gans.trainers import cycle_gan_trainer
+from gans.trainers import optimizers
+from gans.trainers import vanilla_gan_trainer
+from gans.utils import config
+from gans.utils import logging
+
+logger = logging.get_logger(__name__)
+
+
+def benchmark_input_pipeline(dataset, num_batches: int):
+    """Iterates over the training dataset without training and measures its throughput."""
+    train_dataset = getattr(dataset, 'train_dataset', dataset)
+    start_time = time.perf_counter()
+    iterator = iter(train_dataset)
+    first_batch = next(iterator)
+    first_batch_seconds = time.perf_counter() - start_time
+
+    num_read_batches, num_images = 0, 0
+    start_time = time.perf_counter()
+    for _ in range(num_batches):
+        try:
+            batch = next(iterator)
+        except StopIteration:
+            break
+        num_read_batches += 1
+        num_images += int(tf.shape(tf.nest.flatten(batch)[0])[0])
+    seconds = time.perf_counter() - start_time
+    return first_batch, {
+        'first_batch_seconds': first_batch_seconds,
+        'num_batches':         num_read_batches,
+        'batches_per_second':  num_read_batches / seconds if seconds > 0 else None,
+        'images_per_second':   num_images / seconds if seconds > 0 else None,
+        'peak_memory_mb':      basic_callbacks.peak_memory_mb(),
+    }
+
+
+def benchmark_train_step(trainer, batch, num_steps: int):
+    """Runs train steps on a single repeated batch, so the measured rate does not depend on the input pipeline."""
+    iterator = iter(tf.data.Dataset.from_tensors(batch).repeat())
+    # The first step traces the train step.
+    trainer.train_steps(iterator, 1)
+    start_time = time.perf_counter()
+    for _ in range(num_steps):
+        losses = trainer.train_steps(iterator, 1)
+    # Reading the losses waits for the last step to finish.
+    last_losses = {name: float(loss) for name, loss in losses.items()}
+    seconds = time.perf_counter() - start_time
+    return {
+        'num_steps':              num_steps,
+        'train_steps_per_second': num_steps / seconds,
+        'last_losses':            last_losses,
+    }
+
+
+def build_trainer(problem_params, problem_type_name):
+    gan_type = problem_type_name.split('_')[0]
+    training_name = f'BENCHMARK_{problem_type_name}'
+    generator = model_factories.generator_model_factory(problem_params, problem_type_name)
+    discriminator = model_factories.discriminator_model_factory(problem_params, problem_type_name)
+    if gan_type == model_factories.GANType.CYCLE.name:
+        return cycle_gan_trainer.CycleGANTrainer(
+            batch_size=problem_params.batch_size,
+            generators=generator,
+            discriminators=discriminator,
+            training_name=training_name,
+            generators_optimizers=[
+                optimizers.Adam(learning_rate=problem_params.learning_rate_generator, beta_1=0.5)
+                for _ in generator
+            ],
+            discriminators_optimizers=[
+                optimizers.Adam(learning_rate=problem_params.learning_rate_discriminator, beta_1=0.5)
+                for _ in discriminator
+            ],
+            continue_training=False,
+            save_images_every_n_steps=problem_params.save_images_every_n_steps,
+        )
+    trainer_kwargs = dict(
+        batch_size=problem_params.batch_size,
+        generator=generator,
+        discriminator=discriminator,
+        training_name=training_name,
+        generator_optimizer=optimizers.Adam(learning_rate=problem_params.learning_rate_generator, beta_1=0.5),
+        discriminator_optimizer=optimizers.Adam(
+            learning_rate=problem_params.learning_rate_discriminator,
+            beta_1=0.5,
+        ),
+        latent_size=problem_params.latent_size,
+        continue_training=False,
+        save_images_every_n_steps=problem_params.save_images_every_n_steps,
+        validation_dataset=None,
+    )
+    if gan_type == model_factories.GANType.CONDITIONAL.name:
+        return conditional_gan_trainer.ConditionalGANTrainer(num_classes=problem_params.num_classes, **trainer_kwargs)
+    return vanilla_gan_trainer.VanillaGANTrainer(**trainer_kwargs)
+
+
+def run_benchmark(input_args):
+    problem_type_name = input_args.problem_type
+    problem_params = config.read_config(problem_type_name)
+    if 'latent_size' not in problem_params and 'hidden_size' in problem_params:
+        problem_params.latent_size = problem_params.hidden_size
+
+    start_time = time.perf_counter()
+    dataset = dataset_factory.get_dataset(problem_params, problem_type_name)
+    dataset_build_seconds = time.perf_counter() - start_time
+    first_batch, input_pipeline = benchmark_input_pipeline(dataset, input_args.num_batches)
+
+    results = {
+        'problem_type':          problem_type_name,
+        'tensorflow_version':    tf.__version__,
+        'timestamp':             time.time(),
+        'batch_size':            problem_params.batch_size,
+        'dataset_build_seconds': dataset_build_seconds,
+        'input_pipeline':        input_pipeline,
+    }
+    if input_args.num_train_steps > 0:
+        trainer = build_trainer(problem_params, problem_type_name)
+        train_step = benchmark_train_step(trainer, first_batch, input_args.num_train_steps)
+        results['train_step'] = train_step
+        batches_per_second = input_pipeline['batches_per_second']
+        results['input_bound'] = (
+            batches_per_second is not None and batches_per_second < train_step['train_steps_per_second']
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        '--problem_type',
+        required=True,
+        help='The problem type',
+        choices=problem_type.dataset_type_values(),
+    )
+
+    parser.add_argument(
+        '--num_batches',
+        type=int,
+        default=200,
+        help='The number of batches read from the input pipeline',
+    )
+
+    parser.add_argument(
+        '--num_train_steps',
+        type=int,
+        default=20,
+        help='The number of train steps to compare against, 0 to skip training',
+    )
+
+    parser.add_argument(
+        '--output',
+        default=None,
+        help='The JSON file to write the results to, printed if not set',
+    )
+
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    if args.output is None:
+        print(json.dumps(results, indent=2))
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        logger.info(f'Wrote benchmark results to {args.output}.')
+
+
+if __name__ == '__main__':
+    main()
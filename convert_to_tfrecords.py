@@ -0,0 +1,70 @@
+import argparse
+
+from gans.datasets import dataset_factory
+from gans.datasets import problem_type
+from gans.datasets import tfrecords
+from gans.utils import config
+from gans.utils import logging
+
+logger = logging.get_logger(__name__)
+
+
+def convert(input_args):
+    problem_params = config.read_config(input_args.problem_type)
+    problem_params.pop('tfrecords_dir', None)
+    dataset = dataset_factory.get_dataset(problem_params, input_args.problem_type)
+    logger.info(f'Converting {input_args.problem_type} into {input_args.num_shards} shards...')
+    tfrecords.write_tfrecords(
+        dataset=dataset,
+        output_dir=input_args.output_dir,
+        num_shards=input_args.num_shards,
+        compression=input_args.compression,
+        max_examples=input_args.max_examples,
+    )
+    logger.info(f'Set tfrecords_dir: {input_args.output_dir} in the config to train from the shards.')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        '--problem_type',
+        required=True,
+        help='The problem type',
+        choices=problem_type.dataset_type_values(),
+    )
+
+    parser.add_argument(
+        '--output_dir',
+        required=True,
+        help='The directory of the shards',
+    )
+
+    parser.add_argument(
+        '--num_shards',
+        type=int,
+        default=16,
+        help='The number of shards',
+    )
+
+    parser.add_argument(
+        '--compression',
+        default='',
+        help='The compression of the shards',
+        choices=tfrecords.COMPRESSION_TYPES,
+    )
+
+    parser.add_argument(
+        '--max_examples',
+        type=int,
+        default=None,
+        help='The number of examples to convert, required for datasets which repeat',
+    )
+
+    args = parser.parse_args()
+
+    convert(args)
+
+
+if __name__ == '__main__':
+    main()
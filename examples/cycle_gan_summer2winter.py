@@ -23,7 +23,7 @@ dataset = summer2winter.SummerToWinterDataset(model_parameters)
 
 
 def validation_dataset(dataset):
-    summer, _ = next(dataset.train_dataset)
+    summer, _ = next(iter(dataset.train_dataset))
     summer = summer[:4]
     return summer
 
@@ -0,0 +1,57 @@
+import os
+
+import imageio
+import numpy as np
+
+from gans.utils import visualization
+
+
+class AnimationWriter:
+    """
+    Builds an animation of the training progress from the frames handed over by a saver, e.g.
+    `ImageProblemSaver(animation_writer=...)`. Frames are selected as in `visualization.make_gif_from_images`
+    and appended to the file as they come, so nothing is read back from the disk. The saver closes the
+    writer at the end of the training, after its pending snapshots are saved, which completes the
+    animation with the last received frame.
+
+    :param anim_file: path of the animation, its format follows the extension, e.g. '.gif'
+    :param frame_repeats: number of times every selected frame is shown
+    """
+
+    def __init__(
+            self,
+            anim_file: str,
+            frame_repeats: int = 2,
+    ):
+        self.anim_file = anim_file
+        self.frame_repeats = frame_repeats
+        self.writer = None
+        self.num_frames = 0
+        self.last_frame = None
+        self.closed = False
+
+    def add_frame(self, frame):
+        if self.closed:
+            raise ValueError(f'The animation {self.anim_file} is already closed.')
+        frame = np.asarray(frame)
+        if frame.ndim == 3 and frame.shape[-1] == 1:
+            frame = frame[..., 0]
+        self.last_frame = frame
+        is_selected = visualization.is_animation_frame(self.num_frames)
+        self.num_frames += 1
+        if not is_selected:
+            return
+        if self.writer is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.anim_file)), exist_ok=True)
+            self.writer = imageio.get_writer(self.anim_file, mode='I')
+        for _ in range(self.frame_repeats):
+            self.writer.append_data(frame)
+
+    def close(self):
+        self.closed = True
+        if self.writer is None:
+            return
+        # The last frame is shown once more, whether it was selected or not.
+        self.writer.append_data(self.last_frame)
+        self.writer.close()
+        self.writer = None
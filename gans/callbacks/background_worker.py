@@ -0,0 +1,57 @@
+import queue
+import threading
+
+from gans.utils import logging
+
+log = logging.get_logger(__name__)
+
+
+class BackgroundWorker:
+    """
+    Runs tasks one after another on a background thread. The queue of pending tasks is bounded, so
+    when the thread falls behind, new tasks are dropped instead of blocking the caller.
+
+    :param max_pending: number of tasks waiting to be run
+    """
+
+    def __init__(
+            self,
+            max_pending: int = 2,
+    ):
+        self.tasks = queue.Queue(maxsize=max_pending)
+        self.thread = None
+        self.num_submitted = 0
+        self.num_dropped = 0
+        self.num_failed = 0
+
+    def submit(self, function, *args, **kwargs):
+        """Queues a call of `function` and returns whether it was queued or dropped."""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+        self.num_submitted += 1
+        try:
+            self.tasks.put_nowait((function, args, kwargs))
+        except queue.Full:
+            self.num_dropped += 1
+            return False
+        return True
+
+    def run(self):
+        while True:
+            function, args, kwargs = self.tasks.get()
+            try:
+                function(*args, **kwargs)
+            except Exception as e:
+                self.num_failed += 1
+                log.error(f'Background task {getattr(function, "__name__", function)} failed: {e}')
+            finally:
+                self.tasks.task_done()
+
+    @property
+    def num_pending(self):
+        return self.tasks.qsize()
+
+    def flush(self):
+        """Waits until all the queued tasks are done."""
+        self.tasks.join()
@@ -1,7 +1,124 @@
+import sys
+import time
+
+import tensorflow as tf
+
 from gans.callbacks import callback
 
+try:
+    import resource
+except ImportError:
+    resource = None
+
+GPU_DEVICE = 'GPU:0'
+
+
+class PeakMemoryLogger(callback.Callback):
+    """
+    Logs the memory taken by the training steps. On a GPU, with TensorFlow versions which report the memory
+    of the device, `step_peak_memory_mb` is the peak memory of the device during an execution of training
+    steps minus the memory in use before it, i.e. the activations and the gradients of a step without the
+    models and the optimizer states, which shows the savings of the memory saving options.
+
+    The resident memory of the process is only reported as its peak since the process started, in
+    `peak_memory_mb`. `training_peak_memory_mb` is how much it grew since the first training step, it leaves
+    out the memory taken by the datasets and the models before training but stays at zero as long as that
+    memory is larger than the memory of the steps.
+    """
+
+    def __init__(
+            self,
+            every_n_steps: int = 100,
+    ):
+        self.every_n_steps = every_n_steps
+        self.initial_peak_memory_mb = None
+        self.measures_device_memory = device_memory_mb() is not None
+        self.step_begin_memory_mb = None
+
+    def on_epoch_begin(self, trainer):
+        if self.initial_peak_memory_mb is None:
+            self.initial_peak_memory_mb = peak_memory_mb()
+
+    def on_training_step_begin(self, trainer):
+        if self.measures_device_memory:
+            tf.config.experimental.reset_memory_stats(GPU_DEVICE)
+            self.step_begin_memory_mb = device_memory_mb()['current']
+
+    def on_training_step_end(self, trainer):
+        scalars = {}
+        if self.measures_device_memory:
+            scalars['step_peak_memory_mb'] = device_memory_mb()['peak'] - self.step_begin_memory_mb
+        peak_memory = peak_memory_mb()
+        if peak_memory is not None:
+            scalars['peak_memory_mb'] = peak_memory
+            scalars['training_peak_memory_mb'] = peak_memory - self.initial_peak_memory_mb
+        if not scalars:
+            return
+        trainer.logger.log_scalars(
+            name='Memory',
+            scalars=scalars,
+            step=trainer.global_step,
+        )
+
+
+class LossLogger(callback.Callback):
+    """
+    Logs the means, minima and maxima of the losses aggregated by the trainer since the previous flush,
+    and the number of training steps per second over the same period.
+    """
 
-class GlobalStepIncrementer(callback.Callback):
+    def __init__(
+            self,
+            every_n_steps: int = None,
+            every_n_seconds: float = None,
+    ):
+        self.every_n_steps = every_n_steps
+        self.every_n_seconds = every_n_seconds
+        self.last_flush_time = None
+        self.last_flush_step = None
+
+    def on_epoch_begin(self, trainer):
+        if self.last_flush_time is None:
+            self.last_flush_time = time.perf_counter()
+            self.last_flush_step = trainer.global_step
 
     def on_training_step_end(self, trainer):
-        trainer.global_step += 1
+        self.flush(trainer)
+
+    def on_training_end(self, trainer):
+        self.flush(trainer)
+
+    def flush(self, trainer):
+        losses = trainer.loss_aggregator.flush()
+        if not losses:
+            return
+        trainer.logger.log_scalars(name='Losses', scalars=losses, step=trainer.global_step)
+        now = time.perf_counter()
+        steps_per_second = (trainer.global_step - self.last_flush_step) / (now - self.last_flush_time)
+        trainer.logger.log_scalars(name='', scalars={'steps_per_second': steps_per_second}, step=trainer.global_step)
+        self.last_flush_time = now
+        self.last_flush_step = trainer.global_step
+
+
+def peak_memory_mb():
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux.
+    if sys.platform == 'darwin':
+        return max_rss / 2 ** 20
+    return max_rss / 2 ** 10
+
+
+def device_memory_mb():
+    """
+    Returns the current and the peak memory of the first GPU, or None without a GPU or on TensorFlow versions
+    which cannot report and reset them.
+    """
+    experimental_config = tf.config.experimental
+    if not hasattr(experimental_config, 'get_memory_info') or not hasattr(experimental_config, 'reset_memory_stats'):
+        return None
+    if not experimental_config.list_physical_devices('GPU'):
+        return None
+    memory_info = experimental_config.get_memory_info(GPU_DEVICE)
+    return {name: value / 2 ** 20 for name, value in memory_info.items()}
@@ -2,6 +2,14 @@ import abc
 
 
 class Callback(abc.ABC):
+    """
+    The training step hooks run when the callback is due, as declared by `every_n_steps` and
+    `every_n_seconds`. Without either they run after every execution of training steps, with both
+    they run when any of them is due. Callbacks which do not override the training step hooks, e.g.
+    the ones acting at the end of epochs, are not dispatched during the epochs at all.
+    """
+    every_n_steps = None
+    every_n_seconds = None
 
     def on_epoch_begin(self, trainer):
         pass
@@ -14,3 +22,6 @@ class Callback(abc.ABC):
 
     def on_training_step_end(self, trainer):
         pass
+
+    def on_training_end(self, trainer):
+        pass
@@ -1,6 +1,7 @@
 import abc
 
 import tensorflow as tf
+from tensorboard.plugins.image import metadata as image_metadata
 
 
 class Logger(abc.ABC):
@@ -13,6 +14,10 @@ class Logger(abc.ABC):
     def log_images(self, name: str, images, step):
         pass
 
+    @abc.abstractmethod
+    def log_encoded_image(self, name: str, encoded_image: bytes, height: int, width: int, step):
+        pass
+
 
 class TensorboardLogger(Logger):
 
@@ -30,3 +35,13 @@ class TensorboardLogger(Logger):
     def log_images(self, name: str, images, step):
         with self.summary_writer.as_default():
             tf.summary.image(name=name, data=images, step=step)
+
+    def log_encoded_image(self, name: str, encoded_image: bytes, height: int, width: int, step):
+        """Logs an already encoded PNG or JPEG image, without decoding and encoding it again."""
+        with self.summary_writer.as_default():
+            tf.summary.write(
+                tag=name,
+                tensor=tf.constant([str(width).encode(), str(height).encode(), encoded_image]),
+                step=step,
+                metadata=image_metadata.create_summary_metadata(display_name=name, description=None),
+            )
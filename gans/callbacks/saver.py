@@ -1,72 +1,148 @@
+import abc
 import os
 
 import numpy as np
 
+from gans.callbacks import animation
+from gans.callbacks import background_worker
 from gans.callbacks import callback
+from gans.utils import constants
 from gans.utils import visualization
 
 
-class ImageProblemSaver(callback.Callback):
+class ProblemSaver(callback.Callback):
+    """
+    Runs the generators on the validation dataset every `save_images_every_n_steps` steps and saves the
+    outputs. The inference runs on the training thread, the outputs are then saved by a background thread.
+    While `max_pending_snapshots` snapshots are waiting to be saved, new ones are dropped instead of
+    stalling the training, and counted in the `Snapshots/dropped` scalar.
+
+    The saved images of every snapshot, side by side for several generators, are handed over to the
+    `animation_writer` if it is set.
+
+    :param max_pending_snapshots: number of snapshots waiting to be saved, 0 saves them on the training thread
+    :param animation_writer: `AnimationWriter` building an animation of the snapshots
+    """
 
     def __init__(
             self,
             save_images_every_n_steps: int,
             num_test_examples: int = None,
+            max_pending_snapshots: int = 2,
+            animation_writer: animation.AnimationWriter = None,
     ):
         self.save_images_every_n_steps = save_images_every_n_steps
+        self.every_n_steps = save_images_every_n_steps
         self.num_test_examples = num_test_examples
+        self.animation_writer = animation_writer
+        self.worker = None
+        if max_pending_snapshots > 0:
+            self.worker = background_worker.BackgroundWorker(max_pending=max_pending_snapshots)
+
+    @abc.abstractmethod
+    def save(self, trainer, generator_name, predictions, step):
+        """Saves the predictions of a generator and returns the saved image."""
+        raise NotImplementedError
 
     def on_training_step_end(self, trainer):
-        if trainer.global_step % self.save_images_every_n_steps == 0:
-            for name, generator in trainer.generators.items():
-                if self.num_test_examples is None:
-                    if isinstance(trainer.validation_dataset, list):
-                        self.num_test_examples = trainer.validation_dataset[0].shape[0]
-                    else:
-                        self.num_test_examples = trainer.validation_dataset.shape[0]
-
-                img_to_plot = visualization.generate_and_save_images_for_image_problems(
-                    generator_model=generator,
-                    epoch=trainer.global_step,
-                    test_input=trainer.validation_dataset,
-                    save_path=os.path.join(trainer.root_checkpoint_path, 'images'),
-                    num_examples_to_display=self.num_test_examples,
-                )
-                trainer.logger.log_images(
-                    name='test_outputs',
-                    images=np.reshape(img_to_plot, newshape=(1, 480, 640, 4)),
-                    step=trainer.global_step,
-                )
-
-
-class FunctionProblemSaver(callback.Callback):
+        if self.num_test_examples is None:
+            if isinstance(trainer.validation_dataset, list):
+                self.num_test_examples = trainer.validation_dataset[0].shape[0]
+            else:
+                self.num_test_examples = trainer.validation_dataset.shape[0]
+        predictions = {
+            name: trainer.generate(name, trainer.validation_dataset).numpy()
+            for name in trainer.generators
+        }
+        if self.worker is None:
+            self.save_snapshot(trainer, predictions, trainer.global_step)
+            return
+        self.worker.submit(self.save_snapshot, trainer, predictions, trainer.global_step)
+        self.log_worker_metrics(trainer)
+
+    def on_training_end(self, trainer):
+        if self.worker is not None:
+            self.worker.flush()
+            self.log_worker_metrics(trainer)
+        if self.animation_writer is not None:
+            self.animation_writer.close()
+
+    def save_snapshot(self, trainer, predictions, step):
+        images = [
+            self.save(trainer, name, generator_predictions, step)
+            for name, generator_predictions in predictions.items()
+        ]
+        if self.animation_writer is not None:
+            self.animation_writer.add_frame(np.concatenate(images, axis=1))
+
+    def log_worker_metrics(self, trainer):
+        trainer.logger.log_scalars(
+            name='Snapshots',
+            scalars={
+                'dropped': self.worker.num_dropped,
+                'pending': self.worker.num_pending,
+                'failed':  self.worker.num_failed,
+            },
+            step=trainer.global_step,
+        )
+
+
+class ImageProblemSaver(ProblemSaver):
+    """
+    Saves a grid of the outputs of every generator on the validation dataset as PNG files named after the
+    generator, e.g. `generator_f_image_at_epoch_0100.png`, and logs the same encoded images to TensorBoard
+    under `test_outputs/<generator name>`.
+
+    :param thumbnail_scale: factor the grid is resized with before it is encoded, 1.0 keeps the native resolution
+    """
 
     def __init__(
             self,
             save_images_every_n_steps: int,
             num_test_examples: int = None,
+            thumbnail_scale: float = 1.0,
+            max_pending_snapshots: int = 2,
+            animation_writer: animation.AnimationWriter = None,
     ):
-        self.save_images_every_n_steps = save_images_every_n_steps
-        self.num_test_examples = num_test_examples
+        super().__init__(
+            save_images_every_n_steps=save_images_every_n_steps,
+            num_test_examples=num_test_examples,
+            max_pending_snapshots=max_pending_snapshots,
+            animation_writer=animation_writer,
+        )
+        self.thumbnail_scale = thumbnail_scale
 
-    def on_training_step_end(self, trainer):
-        if trainer.global_step % self.save_images_every_n_steps == 0:
-            for name, generator in trainer.generators.items():
-                if self.num_test_examples is None:
-                    if isinstance(trainer.validation_dataset, list):
-                        self.num_test_examples = trainer.validation_dataset[0].shape[0]
-                    else:
-                        self.num_test_examples = trainer.validation_dataset.shape[0]
-                img_to_plot = visualization.generate_and_save_images_for_model_fn_problems(
-                    generator_model=generator,
-                    epoch=trainer.global_step,
-                    test_input=trainer.validation_dataset,
-                    training_name=trainer.training_name,
-                    num_examples_to_display=self.num_test_examples,
-                )
-
-                trainer.logger.log_images(
-                    name='test_outputs',
-                    images=np.reshape(img_to_plot, newshape=(1, 480, 640, 4)),
-                    step=trainer.global_step,
-                )
+    def save(self, trainer, generator_name, predictions, step):
+        grid, encoded_image = visualization.save_image_grid(
+            predictions=predictions,
+            save_path=os.path.join(trainer.root_checkpoint_path, 'images'),
+            step=step,
+            num_examples_to_display=self.num_test_examples,
+            scale=self.thumbnail_scale,
+            name=f'{generator_name}_image',
+        )
+        trainer.logger.log_encoded_image(
+            name=f'test_outputs/{generator_name}',
+            encoded_image=encoded_image,
+            height=grid.shape[0],
+            width=grid.shape[1],
+            step=step,
+        )
+        return grid
+
+
+class FunctionProblemSaver(ProblemSaver):
+
+    def save(self, trainer, generator_name, predictions, step):
+        img_to_plot = visualization.save_function_plot(
+            predictions=predictions,
+            save_path=os.path.join(constants.SAVE_IMAGE_DIR, trainer.training_name),
+            step=step,
+        )
+
+        trainer.logger.log_images(
+            name='test_outputs',
+            images=img_to_plot[np.newaxis],
+            step=step,
+        )
+        return img_to_plot
@@ -0,0 +1,51 @@
+import time
+
+from gans.callbacks import callback
+
+STEP_HOOKS = ['on_training_step_begin', 'on_training_step_end']
+
+
+class CallbackScheduler:
+    """
+    Selects the callbacks whose training step hooks are due for an execution of training steps, following
+    the cadence they declare with `every_n_steps` and `every_n_seconds`.
+
+    A callback scheduled by steps is due when the execution completes a multiple of `every_n_steps` steps.
+    A callback scheduled by time is due when `every_n_seconds` passed since it was last due, and at the
+    first execution. It does not limit the number of steps of an execution, so it can run up to one
+    execution later than its interval.
+    """
+
+    def __init__(self, callbacks):
+        self.step_callbacks = [c for c in callbacks if overrides_step_hooks(c)]
+        self.last_due_times = {}
+
+    def steps_until_due(self, global_step: int):
+        """Returns the number of steps until a callback scheduled by steps is due, None if there is none."""
+        intervals = [c.every_n_steps for c in self.step_callbacks if c.every_n_steps is not None]
+        if not intervals:
+            return None
+        return min(n - global_step % n for n in intervals)
+
+    def due_callbacks(self, global_step: int, num_steps: int):
+        """Returns the callbacks due for the execution of `num_steps` steps after `global_step`."""
+        now = time.perf_counter()
+        due = [c for c in self.step_callbacks if self.is_due(c, global_step, num_steps, now)]
+        for c in due:
+            if c.every_n_seconds is not None:
+                self.last_due_times[c] = now
+        return due
+
+    def is_due(self, c: callback.Callback, global_step: int, num_steps: int, now: float):
+        if c.every_n_steps is None and c.every_n_seconds is None:
+            return True
+        if c.every_n_steps is not None and (global_step + num_steps) % c.every_n_steps < num_steps:
+            return True
+        if c.every_n_seconds is not None:
+            last_due_time = self.last_due_times.get(c)
+            return last_due_time is None or now - last_due_time >= c.every_n_seconds
+        return False
+
+
+def overrides_step_hooks(c: callback.Callback):
+    return any(getattr(type(c), hook) is not getattr(callback.Callback, hook) for hook in STEP_HOOKS)
@@ -1,11 +1,9 @@
-import tensorflow as tf
 from tensorflow.python.keras import datasets
 
-from gans.datasets import abstract_dataset
-from gans.utils import data_utils
+from gans.datasets import in_memory_dataset
 
 
-class Cifar10Dataset(abstract_dataset.Dataset):
+class Cifar10Dataset(in_memory_dataset.InMemoryDataset):
 
     def __init__(
             self,
@@ -14,25 +12,7 @@ class Cifar10Dataset(abstract_dataset.Dataset):
     ):
         super().__init__(input_params, with_labels)
 
-    def __call__(self, *args, **kwargs):
-        return self.train_dataset
-
-    def load_data(self):
-        cifar10 = datasets.cifar10
-        (train_images, _), (_, _) = cifar10.load_data()
-        train_images = train_images.astype('float32')
-        train_images = data_utils.normalize_inputs(train_images)
-        train_dataset = tf.data.Dataset.from_tensor_slices(train_images).shuffle(
-            self.buffer_size).batch(
-            self.batch_size)
-        return train_dataset
-
-    def load_data_with_labels(self):
+    def load_arrays(self):
         cifar10 = datasets.cifar10
         (train_images, train_labels), (_, _) = cifar10.load_data()
-        train_images = train_images.astype('float32')
-        train_images = data_utils.normalize_inputs(train_images)
-        train_dataset = tf.data.Dataset.from_tensor_slices((train_images, train_labels)).shuffle(
-            self.buffer_size).batch(
-            self.batch_size)
-        return train_dataset
+        return train_images, train_labels
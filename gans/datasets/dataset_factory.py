@@ -1,11 +1,15 @@
 from gans.datasets import cifar10
 from gans.datasets import fashion_mnist
+from gans.datasets import image_folder
 from gans.datasets import mnist
 from gans.datasets import problem_type
 from gans.datasets import summer2winter
+from gans.datasets import tfrecords
 
 
 def get_dataset(input_params, dataset_type: problem_type.ProblemType):
+    if input_params.get('tfrecords_dir'):
+        return tfrecords.TFRecordDataset(input_params)
     if dataset_type == problem_type.ProblemType.VANILLA_MNIST.name:
         return mnist.MnistDataset(input_params)
     elif dataset_type == problem_type.ProblemType.VANILLA_FASHION_MNIST.name:
@@ -20,5 +24,7 @@ def get_dataset(input_params, dataset_type: problem_type.ProblemType):
         return cifar10.Cifar10Dataset(input_params, with_labels=True)
     elif dataset_type == problem_type.ProblemType.CYCLE_SUMMER2WINTER.name:
         return summer2winter.SummerToWinterDataset(input_params)
+    elif dataset_type == problem_type.ProblemType.CYCLE_IMAGE_FOLDER.name:
+        return image_folder.ImageFolderDataset(input_params)
     else:
         raise NotImplementedError
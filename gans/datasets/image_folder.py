@@ -0,0 +1,123 @@
+import os
+
+import tensorflow as tf
+
+from gans.datasets import abstract_dataset
+from gans.utils import data_utils
+
+IMAGE_PATTERNS = ['*.jpg', '*.jpeg', '*.png', '*.JPG', '*.JPEG', '*.PNG']
+# Scale denominators supported by the JPEG decoder.
+JPEG_RATIOS = [1, 2, 4, 8]
+
+
+class ImageFolderDataset(abstract_dataset.Dataset):
+    """
+    Streams the images of two local directories, one per domain, as batches of (image_a, image_b) pairs.
+    Files are read with parallel interleaved reads and decoded in parallel, so the directories can be
+    much larger than the memory. JPEGs are decoded at the smallest scale still larger than the target size.
+
+    Unpaired domains are shuffled independently by file names, and an epoch covers the larger domain,
+    repeating the smaller one. Paired domains match the files by their sorted names and shuffle the pairs
+    with a buffer of `buffer_size` names.
+
+    Input parameters: `domain_a_dir`, `domain_b_dir`, `paired` (false by default), `img_height`, `img_width`,
+    `num_channels`, `batch_size` and `buffer_size`.
+    """
+
+    def __init__(
+            self,
+            input_params,
+            with_labels=False,
+    ):
+        self.domain_a_dir = input_params.domain_a_dir
+        self.domain_b_dir = input_params.domain_b_dir
+        self.paired = input_params.get('paired', False)
+        self.img_height = input_params.img_height
+        self.img_width = input_params.img_width
+        self.num_channels = input_params.num_channels
+        super().__init__(input_params, with_labels)
+
+    def __call__(self, *args, **kwargs):
+        return self.train_dataset
+
+    def load_data(self):
+        if self.paired:
+            files = tf.data.Dataset.zip((
+                self.list_files(self.domain_a_dir, shuffle=False),
+                self.list_files(self.domain_b_dir, shuffle=False),
+            )).shuffle(
+                self.buffer_size,
+            )
+            dataset = files.interleave(
+                lambda file_a, file_b: tf.data.Dataset.from_tensors((tf.io.read_file(file_a), tf.io.read_file(file_b))),
+                num_parallel_calls=tf.data.experimental.AUTOTUNE,
+            ).map(
+                lambda contents_a, contents_b: (self.decode_image(contents_a), self.decode_image(contents_b)),
+                num_parallel_calls=tf.data.experimental.AUTOTUNE,
+            )
+        else:
+            domain_a = self.list_files(self.domain_a_dir, shuffle=True)
+            domain_b = self.list_files(self.domain_b_dir, shuffle=True)
+            num_examples = max(
+                int(tf.data.experimental.cardinality(domain_a)),
+                int(tf.data.experimental.cardinality(domain_b)),
+            )
+            dataset = tf.data.Dataset.zip((
+                self.load_images(domain_a).repeat(),
+                self.load_images(domain_b).repeat(),
+            )).take(
+                num_examples,
+            )
+
+        options = tf.data.Options()
+        options.experimental_deterministic = False
+        return dataset.batch(
+            self.batch_size,
+        ).prefetch(
+            tf.data.experimental.AUTOTUNE,
+        ).with_options(
+            options,
+        )
+
+    def load_data_with_labels(self):
+        raise NotImplementedError
+
+    @staticmethod
+    def list_files(directory, shuffle):
+        return tf.data.Dataset.list_files(
+            [os.path.join(directory, pattern) for pattern in IMAGE_PATTERNS],
+            shuffle=shuffle,
+        )
+
+    def load_images(self, files):
+        return files.interleave(
+            lambda file: tf.data.Dataset.from_tensors(tf.io.read_file(file)),
+            num_parallel_calls=tf.data.experimental.AUTOTUNE,
+        ).map(
+            self.decode_image,
+            num_parallel_calls=tf.data.experimental.AUTOTUNE,
+        )
+
+    def decode_image(self, contents):
+        image = tf.cond(
+            tf.io.is_jpeg(contents),
+            lambda: self.decode_jpeg(contents),
+            lambda: tf.io.decode_image(contents, channels=self.num_channels, expand_animations=False),
+        )
+        image = tf.image.resize(image, size=(self.img_height, self.img_width))
+        image = data_utils.normalize_inputs(image)
+        image.set_shape([self.img_height, self.img_width, self.num_channels])
+        return image
+
+    def decode_jpeg(self, contents):
+        """Decodes the JPEG at the smallest scale where it still covers the target size."""
+        shape = tf.image.extract_jpeg_shape(contents)
+        max_ratio = tf.minimum(shape[0] // self.img_height, shape[1] // self.img_width)
+        ratio_index = tf.reduce_sum(tf.cast(tf.constant(JPEG_RATIOS[1:]) <= max_ratio, tf.int32))
+        return tf.switch_case(
+            ratio_index,
+            branch_fns=[
+                lambda ratio=ratio: tf.io.decode_jpeg(contents, channels=self.num_channels, ratio=ratio)
+                for ratio in JPEG_RATIOS
+            ],
+        )
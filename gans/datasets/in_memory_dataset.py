@@ -0,0 +1,62 @@
+from abc import abstractmethod
+
+import tensorflow as tf
+
+from gans.datasets import abstract_dataset
+from gans.utils import data_utils
+
+
+class InMemoryDataset(abstract_dataset.Dataset):
+    """
+    Dataset of uint8 images held in memory. The indices of the examples are shuffled over the whole
+    dataset instead of the examples themselves, and every batch is gathered and normalized to [-1, 1]
+    in the input pipeline, so a single uint8 copy of the images is kept.
+    """
+
+    def __init__(
+            self,
+            input_params,
+            with_labels=False,
+    ):
+        super().__init__(input_params, with_labels)
+
+    def __call__(self, *args, **kwargs):
+        return self.train_dataset
+
+    @abstractmethod
+    def load_arrays(self):
+        """
+        :return: uint8 images of shape [num_examples, height, width, channels] and their labels
+        """
+        raise NotImplementedError
+
+    def load_data(self):
+        train_images, _ = self.load_arrays()
+        return self.make_dataset(train_images)
+
+    def load_data_with_labels(self):
+        train_images, train_labels = self.load_arrays()
+        return self.make_dataset(train_images, train_labels)
+
+    def make_dataset(self, images, labels=None):
+        images = tf.convert_to_tensor(images)
+        if labels is not None:
+            labels = tf.convert_to_tensor(labels)
+        num_examples = images.shape[0]
+
+        def gather_batch(indices):
+            batch_images = data_utils.normalize_inputs(tf.cast(tf.gather(images, indices), tf.float32))
+            if labels is None:
+                return batch_images
+            return batch_images, tf.gather(labels, indices)
+
+        return tf.data.Dataset.range(num_examples).shuffle(
+            num_examples,
+        ).batch(
+            self.batch_size,
+        ).map(
+            gather_batch,
+            num_parallel_calls=tf.data.experimental.AUTOTUNE,
+        ).prefetch(
+            tf.data.experimental.AUTOTUNE,
+        )
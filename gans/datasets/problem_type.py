@@ -9,6 +9,7 @@ class ProblemType(enum.Enum):
     CONDITIONAL_FASHION_MNIST = 4
     CONDITIONAL_CIFAR10 = 5
     CYCLE_SUMMER2WINTER = 6
+    CYCLE_IMAGE_FOLDER = 7
 
 
 def dataset_type_values():
@@ -1,11 +1,23 @@
+import math
+import os
+import time
 from functools import partial
 
 import tensorflow as tf
 import tensorflow_datasets as tfds
 
 from gans.datasets import abstract_dataset
+from gans.utils import constants
+from gans.utils import data_utils
+from gans.utils import logging
 
 TFDS_SUMMER2WINTER_PATH = 'cycle_gan/summer2winter_yosemite'
+# Bump when the cached images change, so the caches of older versions are not read.
+PREPROCESSING_VERSION = 1
+# A run writing a cache completes its first pass well within this time, older locks were left by stopped runs.
+STALE_CACHE_LOCK_SECONDS = 60 * 60
+
+log = logging.get_logger(__name__)
 
 
 class SummerToWinterDataset(abstract_dataset.Dataset):
@@ -17,6 +29,8 @@ class SummerToWinterDataset(abstract_dataset.Dataset):
     ):
         self.img_height = model_parameters.img_height
         self.img_width = model_parameters.img_width
+        self.cache_dir = model_parameters.get('cache_dir', constants.DATASET_CACHE_DIR)
+        self.stale_cache_lock_seconds = model_parameters.get('stale_cache_lock_seconds', STALE_CACHE_LOCK_SECONDS)
         super().__init__(model_parameters, with_labels)
     
     def __call__(self, *args, **kwargs):
@@ -29,48 +43,82 @@ class SummerToWinterDataset(abstract_dataset.Dataset):
             as_supervised=True,
         )
         
-        train_summer, train_winter = dataset['trainA'], dataset['trainB']
-        
-        train_summer = train_summer.map(
-            partial(
-                preprocess_image,
-                img_height=self.img_height,
-                img_width=self.img_width,
-            ),
-            num_parallel_calls=tf.data.experimental.AUTOTUNE,
-        ).repeat(
-        ).shuffle(
-            self.buffer_size,
-        ).batch(
-            self.batch_size,
+        train_summer = self.load_domain(dataset['trainA'], split='trainA')
+        train_winter = self.load_domain(dataset['trainB'], split='trainB')
+
+        # Both domains repeat and are shuffled independently, an epoch covers the larger domain once.
+        num_examples = max(
+            metadata.splits['trainA'].num_examples,
+            metadata.splits['trainB'].num_examples,
         )
-        
-        train_winter = train_winter.map(
+        return tf.data.Dataset.zip(
+            (train_summer, train_winter),
+        ).take(
+            math.ceil(num_examples / self.batch_size),
+        ).prefetch(
+            tf.data.experimental.AUTOTUNE,
+        )
+
+    def load_domain(self, dataset, split):
+        """
+        Resizes the images of a domain and caches them as uint8 in `cache_dir` if it is set, so JPEG decoding
+        and resizing only run for the first pass over the dataset. Nearest neighbor resizing selects pixels
+        without mixing them, so resizing before the normalization gives the same images as after it.
+
+        The images are shuffled as uint8 and normalized once batched, which keeps the shuffle buffer, and
+        the iterator state saved with it, a quarter of the size of float32 images.
+        """
+        dataset = dataset.map(
             partial(
-                preprocess_image,
+                resize_image,
                 img_height=self.img_height,
                 img_width=self.img_width,
             ),
             num_parallel_calls=tf.data.experimental.AUTOTUNE,
-        ).repeat(
+        )
+        if self.cache_dir:
+            dataset = dataset.cache(self.cache_path(split))
+        return dataset.repeat(
         ).shuffle(
             self.buffer_size,
         ).batch(
             self.batch_size,
+            drop_remainder=True,
+        ).map(
+            normalize_image,
+            num_parallel_calls=tf.data.experimental.AUTOTUNE,
         )
-        
-        return zip(train_summer, train_winter)
-    
+
+    def cache_path(self, split):
+        cache_dir = os.path.join(
+            self.cache_dir,
+            f'{TFDS_SUMMER2WINTER_PATH.replace("/", "_")}_{self.img_height}x{self.img_width}_v{PREPROCESSING_VERSION}',
+        )
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_prefix = os.path.join(cache_dir, split)
+        # A run stopped before completing the first pass leaves the lock of its unfinished cache behind,
+        # which would make the cache fail. Locks older than `stale_cache_lock_seconds` are removed and the
+        # cache is written again from the start, younger ones can belong to a run still writing the cache.
+        for lockfile in tf.io.gfile.glob(f'{cache_prefix}*.lockfile'):
+            lock_age_seconds = time.time() - tf.io.gfile.stat(lockfile).mtime_nsec / 1e9
+            if lock_age_seconds < self.stale_cache_lock_seconds:
+                log.warning(f'The dataset cache is locked by a run started {lock_age_seconds:.0f}s ago: {lockfile}.')
+                continue
+            log.warning(f'Removing the lock of an unfinished dataset cache: {lockfile}.')
+            tf.io.gfile.remove(lockfile)
+        return cache_prefix
+
     def load_data_with_labels(self):
         raise NotImplementedError
 
 
-def preprocess_image(image, label, img_height, img_width):
-    image = tf.cast(image, tf.float32)
-    image = (image / 127.5) - 1
-    image = tf.image.resize(
+def resize_image(image, label, img_height, img_width):
+    return tf.image.resize(
         images=image,
         size=(img_height, img_width),
         method=tf.image.ResizeMethod.NEAREST_NEIGHBOR,
     )
-    return image
+
+
+def normalize_image(image):
+    return data_utils.normalize_inputs(tf.cast(image, tf.float32))
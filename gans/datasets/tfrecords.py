@@ -0,0 +1,190 @@
+import json
+import math
+import os
+
+import tensorflow as tf
+
+from gans.datasets import abstract_dataset
+from gans.utils import data_utils
+from gans.utils import logging
+
+METADATA_FILENAME = 'metadata.json'
+SHARD_PATTERN = 'shard-*-of-*.tfrecord'
+COMPRESSION_TYPES = ['', 'GZIP', 'ZLIB']
+SHUFFLE_SEED = 0
+
+log = logging.get_logger(__name__)
+
+
+def write_tfrecords(
+        dataset,
+        output_dir: str,
+        num_shards: int,
+        compression: str = '',
+        max_examples: int = None,
+):
+    """
+    Writes the examples of a dataset into sharded TFRecord files, next to a metadata file describing them.
+    Every component of an example is stored as a serialized tensor. Images normalized to [-1, 1] are stored
+    as uint8, which keeps the files four times smaller than float32.
+
+    :param dataset: `gans.datasets` dataset or batched `tf.data.Dataset` of images, (images, labels) or
+        (images_a, images_b) elements
+    :param output_dir: directory of the shards
+    :param num_shards: number of shards, the examples are distributed round-robin over them
+    :param compression: one of '', 'GZIP' and 'ZLIB'
+    :param max_examples: number of examples to write, required for datasets which repeat
+    :return: number of written examples
+    """
+    if compression not in COMPRESSION_TYPES:
+        raise ValueError(f'Compression has to be one of {COMPRESSION_TYPES}, got {compression}.')
+    train_dataset = getattr(dataset, 'train_dataset', dataset)
+    if not isinstance(train_dataset, tf.data.Dataset):
+        raise ValueError('Only datasets backed by tf.data can be converted to TFRecords.')
+    examples = train_dataset.unbatch()
+    if max_examples is not None:
+        examples = examples.take(max_examples)
+
+    components = [
+        {
+            'dtype':    spec.dtype.name,
+            'shape':    spec.shape.as_list(),
+            'is_image': spec.dtype.is_floating and spec.shape.rank == 3,
+        }
+        for spec in tf.nest.flatten(examples.element_spec)
+    ]
+    is_tuple = isinstance(examples.element_spec, tuple)
+
+    os.makedirs(output_dir, exist_ok=True)
+    options = tf.io.TFRecordOptions(compression_type=compression)
+    writers = [
+        tf.io.TFRecordWriter(os.path.join(output_dir, shard_filename(i, num_shards)), options=options)
+        for i in range(num_shards)
+    ]
+    num_examples = 0
+    for example in examples.map(
+            lambda *tensors: encode_example(tensors, components),
+            num_parallel_calls=tf.data.experimental.AUTOTUNE,
+    ):
+        writers[num_examples % num_shards].write(example.numpy())
+        num_examples += 1
+    for writer in writers:
+        writer.close()
+
+    with open(os.path.join(output_dir, METADATA_FILENAME), 'w') as f:
+        json.dump(
+            {
+                'num_examples': num_examples,
+                'num_shards':   num_shards,
+                'compression':  compression,
+                'is_tuple':     is_tuple,
+                'components':   components,
+            },
+            f,
+            indent=2,
+        )
+    log.info(f'Wrote {num_examples} examples into {num_shards} shards in {output_dir}.')
+    return num_examples
+
+
+def shard_filename(shard_index, num_shards):
+    return f'shard-{shard_index:05d}-of-{num_shards:05d}.tfrecord'
+
+
+def encode_example(tensors, components):
+    serialized_tensors = []
+    for tensor, component in zip(tensors, components):
+        if component['is_image']:
+            tensor = tf.cast(tf.round(tensor * 127.5 + 127.5), tf.uint8)
+        serialized_tensors.append(tf.io.serialize_tensor(tensor))
+    return tf.io.serialize_tensor(tf.stack(serialized_tensors))
+
+
+class TFRecordDataset(abstract_dataset.Dataset):
+    """
+    Reads the shards written by `write_tfrecords`. The shards are interleaved in parallel, and the shards
+    and the examples are shuffled. Unless `deterministic` is set the examples are returned in the order
+    they are read. With `deterministic` they are shuffled with a fixed seed and returned in the same order
+    on every run.
+
+    `num_workers` and `worker_index` split the shards between workers. Otherwise the dataset reads all
+    the examples and its number of batches is known, which the multi-worker strategies' own sharding by
+    files would contradict, so their workers should split the shards explicitly.
+
+    Input parameters: `tfrecords_dir`, `batch_size`, `buffer_size`, `deterministic` (false by default),
+    `num_workers` and `worker_index`.
+    """
+
+    def __init__(
+            self,
+            input_params,
+            with_labels=False,
+    ):
+        self.tfrecords_dir = input_params.tfrecords_dir
+        self.deterministic = input_params.get('deterministic', False)
+        self.num_workers = input_params.get('num_workers', 1)
+        self.worker_index = input_params.get('worker_index', 0)
+        with open(os.path.join(self.tfrecords_dir, METADATA_FILENAME)) as f:
+            self.metadata = json.load(f)
+        super().__init__(input_params, with_labels)
+
+    def __call__(self, *args, **kwargs):
+        return self.train_dataset
+
+    def load_data(self):
+        # The files are sharded in a fixed order, so the workers read disjoint shards covering all of them.
+        files = tf.data.Dataset.list_files(
+            os.path.join(self.tfrecords_dir, SHARD_PATTERN),
+            shuffle=False,
+        )
+        if self.num_workers > 1:
+            files = files.shard(self.num_workers, self.worker_index)
+
+        options = tf.data.Options()
+        options.experimental_deterministic = self.deterministic
+        seed = SHUFFLE_SEED if self.deterministic else None
+        batches = self.read_files(
+            files.shuffle(self.metadata['num_shards'], seed=seed),
+        ).shuffle(
+            self.buffer_size,
+            seed=seed,
+        ).map(
+            self.decode_example,
+            num_parallel_calls=tf.data.experimental.AUTOTUNE,
+        ).batch(
+            self.batch_size,
+        )
+        if self.num_workers == 1:
+            # The number of batches is unknown to tf.data after reading files, the trainers use it as epoch length.
+            batches = batches.apply(
+                tf.data.experimental.assert_cardinality(
+                    math.ceil(self.metadata['num_examples'] / self.batch_size),
+                ),
+            )
+        return batches.prefetch(
+            tf.data.experimental.AUTOTUNE,
+        ).with_options(
+            options,
+        )
+
+    def load_data_with_labels(self):
+        return self.load_data()
+
+    def read_files(self, files):
+        return files.interleave(
+            lambda filename: tf.data.TFRecordDataset(filename, compression_type=self.metadata['compression']),
+            cycle_length=min(self.metadata['num_shards'], 16),
+            num_parallel_calls=tf.data.experimental.AUTOTUNE,
+        )
+
+    def decode_example(self, serialized_example):
+        serialized_tensors = tf.io.parse_tensor(serialized_example, out_type=tf.string)
+        tensors = []
+        for i, component in enumerate(self.metadata['components']):
+            dtype = tf.uint8 if component['is_image'] else tf.as_dtype(component['dtype'])
+            tensor = tf.io.parse_tensor(serialized_tensors[i], out_type=dtype)
+            if component['is_image']:
+                tensor = data_utils.normalize_inputs(tf.cast(tensor, tf.as_dtype(component['dtype'])))
+            tensor.set_shape(component['shape'])
+            tensors.append(tensor)
+        return tuple(tensors) if self.metadata['is_tuple'] else tensors[0]
@@ -1,18 +1,41 @@
 import numpy as np
 import tensorflow as tf
 
-cross_entropy = tf.keras.losses.BinaryCrossentropy(from_logits=True)
+cross_entropy = tf.keras.losses.BinaryCrossentropy(
+    from_logits=True,
+    reduction=tf.keras.losses.Reduction.NONE,
+)
+
+
+def to_float32(*tensors):
+    """
+    Casts model outputs to float32, so the losses are computed in full precision
+    also when the models run with a mixed precision policy.
+    """
+    return [tf.cast(t, tf.float32) for t in tensors]
+
+
+def average_over_batch(per_example_loss):
+    """
+    Averages the loss over all its elements, scaling it by the global batch size. Under a
+    `tf.distribute.Strategy` each replica returns its share of the global mean, so summing
+    the per-replica losses (and gradients) gives the same result as a single device run.
+    """
+    per_example_loss = tf.reshape(per_example_loss, [tf.shape(per_example_loss)[0], -1])
+    return tf.nn.compute_average_loss(tf.reduce_mean(per_example_loss, axis=1))
 
 
 def discriminator_loss(real_output, fake_output):
-    real_loss = cross_entropy(tf.ones_like(real_output), real_output)
-    fake_loss = cross_entropy(tf.zeros_like(fake_output), fake_output)
+    real_output, fake_output = to_float32(real_output, fake_output)
+    real_loss = average_over_batch(cross_entropy(tf.ones_like(real_output), real_output))
+    fake_loss = average_over_batch(cross_entropy(tf.zeros_like(fake_output), fake_output))
     total_loss = real_loss + fake_loss
     return total_loss
 
 
 def generator_loss(fake_output):
-    return cross_entropy(tf.ones_like(fake_output), fake_output)
+    fake_output, = to_float32(fake_output)
+    return average_over_batch(cross_entropy(tf.ones_like(fake_output), fake_output))
 
 
 def cycle_loss(real_image, cycled_image, weight=60):
@@ -21,16 +44,19 @@ def cycle_loss(real_image, cycled_image, weight=60):
 
 
 def identity_loss(real_image, same_image, weight=5):
-    loss = tf.reduce_mean(tf.abs(real_image - same_image))
+    real_image, same_image = to_float32(real_image, same_image)
+    loss = average_over_batch(tf.abs(real_image - same_image))
     return weight * loss
 
 
 def l1_loss(x, y):
-    return tf.reduce_mean(tf.abs(x - y))
+    x, y = to_float32(x, y)
+    return average_over_batch(tf.abs(x - y))
 
 
 def wasserstein_loss(true_output, predicted_output):
-    return tf.reduce_mean(true_output * predicted_output)
+    true_output, predicted_output = to_float32(true_output, predicted_output)
+    return average_over_batch(true_output * predicted_output)
 
 
 def gradient_penalty_loss(predicted_output, averaged_samples):
@@ -43,4 +69,4 @@ def gradient_penalty_loss(predicted_output, averaged_samples):
     )
     gradient_l2_norm = tf.sqrt(gradients_sqr_sum)
     gradient_penalty = gradient_penalty_weight * tf.square(1 - gradient_l2_norm)
-    return tf.reduce_mean(gradient_penalty)
+    return average_over_batch(gradient_penalty)
@@ -0,0 +1,113 @@
+import os
+import time
+
+import tensorflow as tf
+
+from gans.models import model
+from gans.utils import constants
+from gans.utils import logging
+from gans.utils import mixed_precision
+
+SERVING_SIGNATURE = 'serving_default'
+OUTPUTS_KEY = 'outputs'
+
+log = logging.get_logger(__name__)
+
+
+class ExportedGenerator:
+    """Generator loaded from a SavedModel written by `export_generator`."""
+
+    def __init__(
+            self,
+            export_dir: str,
+    ):
+        start_time = time.perf_counter()
+        self.saved_model = tf.saved_model.load(export_dir)
+        self.serving_function = self.saved_model.signatures[SERVING_SIGNATURE]
+        self.load_seconds = time.perf_counter() - start_time
+        log.info(f'Loaded generator from {export_dir} in {self.load_seconds:.2f}s.')
+
+    def __call__(self, inputs):
+        inputs = tf.nest.flatten(inputs)
+        outputs = self.serving_function(**{f'input_{i}': x for i, x in enumerate(inputs)})
+        return outputs[OUTPUTS_KEY]
+
+
+def restore_generator(
+        generator: model.Model,
+        generator_name: str,
+        training_name: str,
+):
+    """
+    Restores the weights of a generator from the latest training checkpoint, without the discriminators
+    and the optimizers of the training.
+
+    :param generator: generator built with the same parameters as in the training
+    :param generator_name: name of the generator in the trainer, e.g. 'generator' or 'generator_f'
+    :param training_name: name of the training the checkpoints were saved for
+    """
+    checkpoint_dir = os.path.join(constants.SAVE_IMAGE_DIR, training_name, constants.CHECKPOINT_DIR)
+    latest_checkpoint = tf.train.latest_checkpoint(checkpoint_dir)
+    if latest_checkpoint is None:
+        raise ValueError(f'No checkpoints found in {checkpoint_dir}.')
+    tf.train.Checkpoint(**{generator_name: generator.model}).restore(latest_checkpoint).expect_partial()
+    log.info(f'Restored {generator_name} from checkpoint: {latest_checkpoint}.')
+    return generator
+
+
+def export_generator(
+        generator: model.Model,
+        export_dir: str,
+        float16: bool = False,
+):
+    """
+    Writes the weights of the generator with a serving signature to a SavedModel. The inputs of the
+    signature are named `input_0`, `input_1`, ... and the generated examples are returned under `outputs`.
+
+    :param generator: generator to export, its model is cloned for float16 weights
+    :param export_dir: directory of the SavedModel
+    :param float16: whether to store the weights and run the inference in float16
+    """
+    keras_model = generator.model
+    if float16:
+        keras_model = cast_model(keras_model, policy_name='float16')
+
+    @tf.function(input_signature=[
+        tf.TensorSpec(shape=t.shape, dtype=t.dtype, name=f'input_{i}')
+        for i, t in enumerate(keras_model.inputs)
+    ])
+    def serve(*inputs):
+        outputs = keras_model(inputs[0] if len(inputs) == 1 else list(inputs), training=False)
+        return {OUTPUTS_KEY: tf.cast(outputs, tf.float32)}
+
+    # Only the variables are tracked, so the Keras layers are not serialized with the SavedModel.
+    module = tf.Module()
+    module.model_variables = keras_model.weights
+    module.serve = serve
+    tf.saved_model.save(module, export_dir, signatures={SERVING_SIGNATURE: serve.get_concrete_function()})
+    log.info(f'Exported {generator.model_name} to {export_dir}.')
+
+
+def load_generator(export_dir: str):
+    return ExportedGenerator(export_dir)
+
+
+def cast_model(keras_model: tf.keras.Model, policy_name: str):
+    """
+    Clones a Keras model with its layers created under the `policy_name` mixed precision policy and copies
+    its weights into the clone. The layers are rebuilt from their configs, whose dtype is replaced by the
+    policy, since it would otherwise keep the policy the layers were created with.
+    """
+    def clone_layer(layer):
+        config = layer.get_config()
+        config['dtype'] = policy_name
+        return layer.__class__.from_config(config)
+
+    previous_policy = mixed_precision.global_policy()
+    mixed_precision.set_policy(policy_name)
+    try:
+        casted_model = tf.keras.models.clone_model(keras_model, clone_function=clone_layer)
+    finally:
+        mixed_precision.set_policy(previous_policy.name)
+    casted_model.set_weights(keras_model.get_weights())
+    return casted_model
@@ -110,8 +110,8 @@ class DenseNetGenerator(model.Model):
             strides=(1, 1),
             padding='same',
             use_bias=False,
-            activation='tanh',
         )(x8)
+        x9 = layers.Activation('tanh', dtype='float32')(x9)
 
         model = Model(name=self.model_name, inputs=input_images, outputs=x9)
         return model
@@ -109,8 +109,8 @@ class EncoderDecoderGenerator(model.Model):
             strides=(1, 1),
             padding='same',
             use_bias=False,
-            activation='tanh',
         )(x)
+        x = layers.Activation('tanh', dtype='float32')(x)
 
         model = Model(name=self.model_name, inputs=input_images, outputs=x)
         return model
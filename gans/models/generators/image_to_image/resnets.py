@@ -71,9 +71,9 @@ class SingleScaleGenerator(model.Model):
             filters=3,
             kernel_size=(3, 3),
             padding='same',
-            activation='tanh',
             use_bias=False,
         )(xz)
+        xz = layers.Activation('tanh', dtype='float32')(xz)
 
         if self.model_parameters.has_input_images:
             xz += x
@@ -119,8 +119,8 @@ class UNetGenerator(model.Model):
             strides=(1, 1),
             padding='same',
             use_bias=False,
-            activation='tanh',
         )(x8)
+        x9 = layers.Activation('tanh', dtype='float32')(x9)
 
         model = Model(name=self.model_name, inputs=input_images, outputs=x9)
         return model
@@ -238,8 +238,8 @@ class UNetSubpixelGenerator(model.Model):
             strides=(1, 1),
             padding='same',
             use_bias=False,
-            activation='tanh',
         )(x8)
+        x9 = layers.Activation('tanh', dtype='float32')(x9)
 
         model = Model(name=self.model_name, inputs=input_images, outputs=x9)
         return model
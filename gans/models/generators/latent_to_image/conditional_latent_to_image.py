@@ -38,7 +38,8 @@ class LatentToImageConditionalGenerator(model.Model):
         x = layers.BatchNormalization()(x)
         x = layers.LeakyReLU()(x)
 
-        x = layers.Conv2DTranspose(1, (5, 5), strides=(2, 2), padding='same', use_bias=False, activation='tanh')(x)
+        x = layers.Conv2DTranspose(1, (5, 5), strides=(2, 2), padding='same', use_bias=False)(x)
+        x = layers.Activation('tanh', dtype='float32')(x)
 
         model = Model(name=self.model_name, inputs=[z, class_id], outputs=x)
         return model
@@ -87,7 +88,8 @@ class LatentToImageCifar10CConditionalGenerator(model.Model):
         x = layers.BatchNormalization(momentum=0.9)(x)
         x = layers.LeakyReLU(alpha=0.1)(x)
 
-        x = layers.Conv2D(3, kernel_size=(5, 5), strides=(1, 1), padding='same', use_bias=False, activation='tanh')(x)
+        x = layers.Conv2D(3, kernel_size=(5, 5), strides=(1, 1), padding='same', use_bias=False)(x)
+        x = layers.Activation('tanh', dtype='float32')(x)
 
         model = Model(name=self.model_name, inputs=[z, class_id], outputs=x)
         return model
@@ -127,7 +129,8 @@ class LatentToImageNNUpsamplingCifar10CConditionalGenerator(model.Model):
         x = layers.LeakyReLU()(x)
         x = layers.UpSampling2D()(x)
 
-        x = layers.Conv2D(3, (5, 5), strides=(1, 1), padding='same', use_bias=False, activation='tanh')(x)
+        x = layers.Conv2D(3, (5, 5), strides=(1, 1), padding='same', use_bias=False)(x)
+        x = layers.Activation('tanh', dtype='float32')(x)
 
         model = Model(name=self.model_name, inputs=[z, class_id], outputs=x)
         return model
@@ -168,7 +171,8 @@ class LatentToImageNNUpSamplingConditionalGenerator(model.Model):
 
         x = layers.UpSampling2D()(x)
 
-        x = layers.Conv2D(1, (5, 5), strides=(1, 1), padding='same', use_bias=False, activation='tanh')(x)
+        x = layers.Conv2D(1, (5, 5), strides=(1, 1), padding='same', use_bias=False)(x)
+        x = layers.Activation('tanh', dtype='float32')(x)
 
         model = Model(name=self.model_name, inputs=[z, class_id], outputs=x)
         return model
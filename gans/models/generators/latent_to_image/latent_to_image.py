@@ -30,7 +30,8 @@ class LatentToImageGenerator(model.Model):
         x = layers.BatchNormalization()(x)
         x = layers.LeakyReLU()(x)
 
-        x = layers.Conv2DTranspose(1, (5, 5), strides=(2, 2), padding='same', use_bias=False, activation='tanh')(x)
+        x = layers.Conv2DTranspose(1, (5, 5), strides=(2, 2), padding='same', use_bias=False)(x)
+        x = layers.Activation('tanh', dtype='float32')(x)
 
         model = Model(name=self.model_name, inputs=z, outputs=x)
         return model
@@ -60,7 +61,8 @@ class LatentToImageCifar10Generator(model.Model):
         x = layers.BatchNormalization()(x)
         x = layers.LeakyReLU()(x)
 
-        x = layers.Conv2DTranspose(3, (5, 5), strides=(2, 2), padding='same', use_bias=False, activation='tanh')(x)
+        x = layers.Conv2DTranspose(3, (5, 5), strides=(2, 2), padding='same', use_bias=False)(x)
+        x = layers.Activation('tanh', dtype='float32')(x)
 
         model = Model(name=self.model_name, inputs=z, outputs=x)
         return model
@@ -92,7 +94,8 @@ class LatentToImageCifar10NearestNeighborUpSamplingGenerator(model.Model):
         x = layers.LeakyReLU()(x)
 
         x = layers.UpSampling2D()(x)
-        x = layers.Conv2D(3, (5, 5), strides=(1, 1), padding='same', use_bias=False, activation='tanh')(x)
+        x = layers.Conv2D(3, (5, 5), strides=(1, 1), padding='same', use_bias=False)(x)
+        x = layers.Activation('tanh', dtype='float32')(x)
 
         model = Model(name=self.model_name, inputs=z, outputs=x)
         return model
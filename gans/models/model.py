@@ -4,6 +4,8 @@ from abc import abstractmethod
 from easydict import EasyDict as edict
 from tensorflow.python import keras
 
+from gans.models import recompute
+
 
 class Model(ABC):
 
@@ -13,10 +15,28 @@ class Model(ABC):
     ):
         self._model_parameters = model_parameters
         self._model = self.define_model()
+        self._recomputed_model = None
+        if model_parameters is not None and model_parameters.get('recompute_segments'):
+            self.enable_recompute(model_parameters.recompute_segments)
 
     def __call__(self, inputs, **kwargs):
+        if self._recomputed_model is not None and kwargs.get('training'):
+            return self._recomputed_model(inputs, training=True)
         return self.model(inputs=inputs, **kwargs)
 
+    def enable_recompute(self, num_segments: int):
+        """
+        Recomputes the activations of the model during backpropagation instead of keeping them in memory,
+        for the calls made with `training=True`. Can also be enabled with `recompute_segments` in the model
+        parameters.
+
+        :param num_segments: number of segments of consecutive layers, see `recompute.RecomputedModel`
+        """
+        self._recomputed_model = recompute.RecomputedModel(self.model, num_segments)
+
+    def disable_recompute(self):
+        self._recomputed_model = None
+
     @abstractmethod
     def define_model(self) -> keras.Model:
         raise NotImplementedError
@@ -33,6 +53,11 @@ class Model(ABC):
     def model_parameters(self) -> edict:
         return self._model_parameters
 
+    @property
+    def uses_batch_statistics(self) -> bool:
+        """Whether the outputs for an example depend on the other examples of the batch during training."""
+        return any(isinstance(layer, keras.layers.BatchNormalization) for layer in self.model.submodules)
+
     @property
     def num_channels(self) -> int:
         return self.model.output_shape[-1]
@@ -156,7 +156,7 @@ def generator_model_factory(
     elif problem_type == pt.ProblemType.CONDITIONAL_CIFAR10.name:
         return conditional_latent_to_image.LatentToImageCifar10CConditionalGenerator(
             input_params)
-    elif problem_type == pt.ProblemType.CYCLE_SUMMER2WINTER.name:
+    elif problem_type in [pt.ProblemType.CYCLE_SUMMER2WINTER.name, pt.ProblemType.CYCLE_IMAGE_FOLDER.name]:
         return [unet.UNetGenerator(input_params), unet.UNetGenerator(input_params)]
     else:
         raise NotImplementedError
@@ -178,7 +178,7 @@ def discriminator_model_factory(
         return conditional_discriminator.ConditionalDiscriminator(input_params)
     elif dataset_type == pt.ProblemType.CONDITIONAL_CIFAR10.name:
         return conditional_discriminator.ConditionalDiscriminatorCifar10(input_params)
-    elif dataset_type == pt.ProblemType.CYCLE_SUMMER2WINTER.name:
+    elif dataset_type in [pt.ProblemType.CYCLE_SUMMER2WINTER.name, pt.ProblemType.CYCLE_IMAGE_FOLDER.name]:
         return [patch_discriminator.PatchDiscriminator(input_params),
                 patch_discriminator.PatchDiscriminator(input_params)]
     else:
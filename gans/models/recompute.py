@@ -0,0 +1,79 @@
+import math
+
+import tensorflow as tf
+from tensorflow.python import keras
+
+
+class RecomputedModel:
+    """
+    Runs a functional Keras model as a chain of segments of consecutive layers. Only the tensors passed
+    between the segments are kept for backpropagation, the activations inside a segment are recomputed
+    during the backward pass.
+
+    More segments keep more tensors at their boundaries but recompute less at once; about the square root
+    of the number of layers gives the lowest peak memory. Layers updating state when called, such as the
+    moving statistics of batch normalization, are updated again when their segment is recomputed.
+
+    :param keras_model: functional model whose layers are each called once
+    :param num_segments: number of segments the layers are split into
+    """
+
+    def __init__(
+            self,
+            keras_model: keras.Model,
+            num_segments: int,
+    ):
+        if not keras_model._is_graph_network:
+            raise ValueError(f'Recomputation requires a functional model, got {keras_model.name}.')
+        model_layers = [
+            layer for layer in keras_model.layers
+            if not isinstance(layer, keras.layers.InputLayer)
+        ]
+        segment_size = math.ceil(len(model_layers) / max(1, min(num_segments, len(model_layers))))
+        self.segments = [
+            model_layers[i:i + segment_size]
+            for i in range(0, len(model_layers), segment_size)
+        ]
+        self.model_inputs = keras_model.inputs
+        self.model_outputs = keras_model.outputs
+        self.segments_inputs, self.segments_outputs = self.trace_segments_boundaries()
+
+    def trace_segments_boundaries(self):
+        """Finds the tensors each segment consumes from and passes on to the rest of the model."""
+        segments_inputs, segments_outputs = [], []
+        needed_later = {id(t): t for t in self.model_outputs}
+        for segment in reversed(self.segments):
+            produced = {id(t): t for layer in segment for t in tf.nest.flatten(layer.output)}
+            consumed = {id(t): t for layer in segment for t in tf.nest.flatten(layer.input)}
+            segments_outputs.append([t for k, t in produced.items() if k in needed_later])
+            segments_inputs.append([t for k, t in consumed.items() if k not in produced])
+            needed_later = {k: t for k, t in needed_later.items() if k not in produced}
+            needed_later.update({k: t for k, t in consumed.items() if k not in produced})
+        return segments_inputs[::-1], segments_outputs[::-1]
+
+    def __call__(self, inputs, training=None):
+        values = {
+            id(symbolic): tf.convert_to_tensor(actual)
+            for symbolic, actual in zip(self.model_inputs, tf.nest.flatten(inputs))
+        }
+        for segment, segment_inputs, segment_outputs in zip(self.segments, self.segments_inputs, self.segments_outputs):
+            forward = tf.recompute_grad(self.segment_function(segment, segment_inputs, segment_outputs, training))
+            outputs = forward(*[values[id(t)] for t in segment_inputs])
+            values.update({id(symbolic): actual for symbolic, actual in zip(segment_outputs, outputs)})
+        outputs = [values[id(t)] for t in self.model_outputs]
+        return outputs[0] if len(outputs) == 1 else outputs
+
+    @staticmethod
+    def segment_function(segment, segment_inputs, segment_outputs, training):
+        def forward(*inputs):
+            values = {id(symbolic): actual for symbolic, actual in zip(segment_inputs, inputs)}
+            for layer in segment:
+                layer_inputs = tf.nest.map_structure(lambda t: values[id(t)], layer.input)
+                layer_outputs = layer(layer_inputs, training=training)
+                values.update({
+                    id(symbolic): actual
+                    for symbolic, actual in zip(tf.nest.flatten(layer.output), tf.nest.flatten(layer_outputs))
+                })
+            return [values[id(t)] for t in segment_outputs]
+
+        return forward
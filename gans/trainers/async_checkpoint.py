@@ -0,0 +1,126 @@
+import os
+import queue
+import threading
+import time
+from concurrent import futures
+
+import tensorflow as tf
+from tensorflow.python.training.tracking import base
+from tensorflow.python.training.tracking import graph_view
+
+from gans.utils import logging
+
+log = logging.get_logger(__name__)
+
+
+class AsyncCheckpointWriter:
+    """
+    Writes checkpoints in a background thread. The values of the variables are copied to host memory
+    when `save` is called, so training can go on updating them while the copy is written.
+
+    The files and the checkpoint state are the same as written by `tf.train.CheckpointManager`, so the
+    checkpoints can be restored with `tf.train.Checkpoint.restore`.
+
+    :param directory: directory of the checkpoints
+    :param max_to_keep: number of most recent checkpoints kept on disk
+    :param max_in_flight: number of snapshots waiting to be written, `save` blocks when it is reached
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            max_to_keep: int = 3,
+            max_in_flight: int = 1,
+    ):
+        self.directory = directory
+        self.max_to_keep = max_to_keep
+        self.in_flight = threading.BoundedSemaphore(max_in_flight)
+        self.executor = futures.ThreadPoolExecutor(max_workers=1)
+        self.pending = []
+        self.reports = queue.Queue()
+        self.num_failures = 0
+        checkpoint_state = tf.train.get_checkpoint_state(directory)
+        self.checkpoints = list(checkpoint_state.all_model_checkpoint_paths) if checkpoint_state else []
+
+    def save(self, checkpoint: tf.train.Checkpoint, checkpoint_number: int):
+        start_time = time.perf_counter()
+        self.in_flight.acquire()
+        try:
+            snapshot = self.snapshot(checkpoint)
+        except Exception:
+            self.in_flight.release()
+            raise
+        snapshot_seconds = time.perf_counter() - start_time
+        prefix = os.path.join(self.directory, f'ckpt-{checkpoint_number}')
+        future = self.executor.submit(self.write, prefix, snapshot, snapshot_seconds)
+        self.pending = [f for f in self.pending if not f.done()] + [future]
+        return prefix
+
+    @staticmethod
+    def snapshot(checkpoint: tf.train.Checkpoint):
+        named_saveable_objects, object_graph_proto, _ = graph_view.ObjectGraphView(
+            checkpoint,
+        ).serialize_object_graph()
+        names = [base.OBJECT_GRAPH_PROTO_KEY]
+        slices = ['']
+        values = [object_graph_proto.SerializeToString()]
+        # Variables copy their buffer when they are updated while it is still referenced, so the tensors
+        # read here keep the values of the snapshot. Iterator states are variant tensors, they stay tensors.
+        with tf.device('/cpu:0'):
+            for saveable in named_saveable_objects:
+                for spec in saveable.specs:
+                    names.append(spec.name)
+                    slices.append(spec.slice_spec)
+                    values.append(tf.identity(spec.tensor))
+        return names, slices, values
+
+    def write(self, prefix, snapshot, snapshot_seconds):
+        start_time = time.perf_counter()
+        try:
+            names, slices, values = snapshot
+            tf.io.gfile.makedirs(self.directory)
+            with tf.device('/cpu:0'):
+                tf.raw_ops.SaveV2(
+                    prefix=prefix,
+                    tensor_names=names,
+                    shape_and_slices=slices,
+                    tensors=values,
+                )
+            self.update_checkpoint_state(prefix)
+            self.reports.put((prefix, snapshot_seconds, time.perf_counter() - start_time, None))
+        except Exception as e:
+            self.reports.put((prefix, snapshot_seconds, time.perf_counter() - start_time, e))
+        finally:
+            self.in_flight.release()
+
+    def update_checkpoint_state(self, prefix):
+        self.checkpoints = [c for c in self.checkpoints if c != prefix] + [prefix]
+        stale_checkpoints = self.checkpoints[:-self.max_to_keep]
+        self.checkpoints = self.checkpoints[-self.max_to_keep:]
+        tf.compat.v1.train.update_checkpoint_state(
+            save_dir=self.directory,
+            model_checkpoint_path=prefix,
+            all_model_checkpoint_paths=self.checkpoints,
+        )
+        for stale_checkpoint in stale_checkpoints:
+            for filename in tf.io.gfile.glob(f'{stale_checkpoint}.*'):
+                tf.io.gfile.remove(filename)
+
+    def collect_reports(self):
+        """
+        Returns the checkpoints written since the last call as (prefix, snapshot seconds, write seconds)
+        and logs the ones which failed.
+        """
+        written = []
+        while not self.reports.empty():
+            prefix, snapshot_seconds, write_seconds, error = self.reports.get()
+            if error is not None:
+                self.num_failures += 1
+                log.error(f'Failed to write checkpoint {prefix}: {error}')
+            else:
+                written.append((prefix, snapshot_seconds, write_seconds))
+        return written
+
+    def wait(self):
+        futures.wait(self.pending)
+        self.pending = []
@@ -1,9 +1,9 @@
-import numpy as np
 import tensorflow as tf
 
 from gans.layers import losses
 from gans.models import model
 from gans.trainers import gan_trainer
+from gans.utils import mixed_precision
 
 SEED = 0
 
@@ -25,12 +25,15 @@ class ConditionalGANTrainer(gan_trainer.GANTrainer):
             checkpoint_step: int = 10,
             validation_dataset=None,
             callbacks=None,
+            batch_discriminator_calls=False,
+            **kwargs,
     ):
         self.generator = generator
         self.discriminator = discriminator
-        self.generator_optimizer = generator_optimizer
-        self.discriminator_optimizer = discriminator_optimizer
+        self.generator_optimizer = mixed_precision.loss_scale_optimizer(generator_optimizer)
+        self.discriminator_optimizer = mixed_precision.loss_scale_optimizer(discriminator_optimizer)
         self.latent_size = latent_size
+        self.batch_discriminator_calls = batch_discriminator_calls
         self.num_classes = num_classes
         super().__init__(
             batch_size=batch_size,
@@ -48,39 +51,36 @@ class ConditionalGANTrainer(gan_trainer.GANTrainer):
             checkpoint_step=checkpoint_step,
             validation_dataset=validation_dataset,
             callbacks=callbacks,
+            **kwargs,
         )
 
-    @tf.function
     def train_step(self, batch):
+        return self.optimize(
+            compute_losses=self.compute_losses,
+            batch=batch,
+            objectives={
+                'generator_loss':     (self.generator, self.generator_optimizer),
+                'discriminator_loss': (self.discriminator, self.discriminator_optimizer),
+            },
+        )
+
+    def compute_losses(self, batch):
         real_examples, real_labels = batch
-        batch_size = real_examples.shape[0]
+        batch_size = tf.shape(real_examples)[0]
         generator_inputs = tf.random.normal([batch_size, self.latent_size])
-        fake_labels = np.random.randint(0, self.num_classes, batch_size)
-
-        with tf.GradientTape(persistent=True) as tape:
-            fake_examples = self.generator([generator_inputs, fake_labels], training=True)
+        fake_labels = tf.random.uniform([batch_size], maxval=self.num_classes, dtype=tf.int32)
 
-            real_output = self.discriminator([real_examples, real_labels], training=True)
-            fake_output = self.discriminator([fake_examples, fake_labels], training=True)
+        fake_examples = self.generator([generator_inputs, fake_labels], training=True)
 
-            generator_loss = losses.generator_loss(fake_output)
-            discriminator_loss = losses.discriminator_loss(real_output, fake_output)
-
-        gradients_of_generator = tape.gradient(
-            target=generator_loss,
-            sources=self.generator.trainable_variables,
-        )
-        gradients_of_discriminator = tape.gradient(
-            target=discriminator_loss,
-            sources=self.discriminator.trainable_variables,
+        real_output, fake_output = self.discriminate(
+            discriminator=self.discriminator,
+            real_inputs=[real_examples, real_labels],
+            fake_inputs=[fake_examples, fake_labels],
+            batched=self.batch_discriminator_calls,
         )
 
-        self.generator_optimizer.apply_gradients(
-            grads_and_vars=zip(gradients_of_generator, self.generator.trainable_variables)
-        )
-        self.discriminator_optimizer.apply_gradients(
-            grads_and_vars=zip(gradients_of_discriminator, self.discriminator.trainable_variables)
-        )
+        generator_loss = losses.generator_loss(fake_output)
+        discriminator_loss = losses.discriminator_loss(real_output, fake_output)
 
         return {
             'generator_loss':     generator_loss,
@@ -4,6 +4,7 @@ from overrides import overrides
 from gans.layers import losses
 from gans.trainers import gan_trainer
 from gans.utils import logging
+from gans.utils import mixed_precision
 
 SEED = 0
 NUM_TEST_EXAMPLES = 4
@@ -26,11 +27,27 @@ class CycleGANTrainer(gan_trainer.GANTrainer):
             checkpoint_step=10,
             validation_dataset=None,
             callbacks=None,
+            batch_generator_calls=False,
+            memory_lean_step=False,
+            **kwargs,
     ):
-        self.generator_optimizer_f, self.generator_optimizer_g = generators_optimizers
-        self.discriminator_optimizer_x, self.discriminator_optimizer_y = discriminators_optimizers
+        """
+        With `memory_lean_step` the generators and the discriminators are updated from two separate
+        tapes, so the activations of the generators are released before the discriminators run on the
+        real examples. The updates are the same as with the default step, at the cost of two
+        more discriminator calls on the fake examples. Compare `Memory/step_peak_memory_mb` on a GPU to see the
+        savings, see `PeakMemoryLogger`.
+        """
+        self.generator_optimizer_f, self.generator_optimizer_g = [
+            mixed_precision.loss_scale_optimizer(optimizer) for optimizer in generators_optimizers
+        ]
+        self.discriminator_optimizer_x, self.discriminator_optimizer_y = [
+            mixed_precision.loss_scale_optimizer(optimizer) for optimizer in discriminators_optimizers
+        ]
         self.discriminator_x, self.discriminator_y = discriminators
         self.generator_f, self.generator_g = generators
+        self.batch_generator_calls = batch_generator_calls
+        self.memory_lean_step = memory_lean_step
         super().__init__(
             batch_size=batch_size,
             generators={
@@ -56,86 +73,127 @@ class CycleGANTrainer(gan_trainer.GANTrainer):
             checkpoint_step=checkpoint_step,
             validation_dataset=validation_dataset,
             callbacks=callbacks,
+            **kwargs,
         )
+        if self.memory_lean_step and self.gradient_accumulation_steps > 1:
+            raise ValueError('The memory lean step does not support gradient accumulation.')
 
-    @tf.function
     @overrides
     def train_step(self, batch):
+        if self.memory_lean_step:
+            return self.memory_lean_train_step(batch)
+        return self.optimize(
+            compute_losses=self.compute_losses,
+            batch=batch,
+            objectives={
+                'total_generator_g_loss': (self.generator_g, self.generator_optimizer_g),
+                'total_generator_f_loss': (self.generator_f, self.generator_optimizer_f),
+                'discriminator_x_loss':   (self.discriminator_x, self.discriminator_optimizer_x),
+                'discriminator_y_loss':   (self.discriminator_y, self.discriminator_optimizer_y),
+            },
+        )
+
+    def memory_lean_train_step(self, batch):
         real_x, real_y = batch
+        generators_objectives = {
+            'total_generator_g_loss': (self.generator_g, self.generator_optimizer_g),
+            'total_generator_f_loss': (self.generator_f, self.generator_optimizer_f),
+        }
+        discriminators_objectives = {
+            'discriminator_x_loss': (self.discriminator_x, self.discriminator_optimizer_x),
+            'discriminator_y_loss': (self.discriminator_y, self.discriminator_optimizer_y),
+        }
 
+        # Every loss is scaled by the optimizer of its model, so each model keeps its own loss scale.
         with tf.GradientTape(persistent=True) as tape:
-            fake_y = self.generator_g(real_x, training=True)
-            cycled_x = self.generator_f(fake_y, training=True)
-
-            fake_x = self.generator_f(real_y, training=True)
-            cycled_y = self.generator_g(fake_x, training=True)
-
-            # same_x and same_y are used for identity loss.
-            same_x = self.generator_f(real_x, training=True)
-            same_y = self.generator_g(real_y, training=True)
+            generator_losses, fake_x, fake_y, _, _ = self.compute_generator_losses(real_x, real_y)
+            scaled_generator_losses = self.scale_losses(generator_losses, generators_objectives)
+        gradients = self.unscaled_gradients(tape, scaled_generator_losses, generators_objectives)
+        # Releases the activations of the generators before the discriminators run on the real examples.
+        del tape
 
-            disc_real_x = self.discriminator_x(real_x, training=True)
-            disc_real_y = self.discriminator_y(real_y, training=True)
-
-            disc_fake_x = self.discriminator_x(fake_x, training=True)
-            disc_fake_y = self.discriminator_y(fake_y, training=True)
-
-            # calculate the loss
-            generator_g_loss = losses.generator_loss(disc_fake_y)
-            generator_f_loss = losses.generator_loss(disc_fake_x)
-
-            cycle_loss_x = losses.cycle_loss(real_x, cycled_x)
-            cycle_loss_y = losses.cycle_loss(real_y, cycled_y)
-
-            total_cycle_loss = cycle_loss_x + cycle_loss_y
-
-            identity_loss_y = losses.identity_loss(real_y, same_y)
-            identity_loss_x = losses.identity_loss(real_x, same_x)
-            # Total generator loss = adversarial loss + cycle loss
-            total_generator_g_loss = generator_g_loss + total_cycle_loss + identity_loss_y
-            total_generator_f_loss = generator_f_loss + total_cycle_loss + identity_loss_x
+        with tf.GradientTape(persistent=True) as tape:
+            disc_fake_x = self.discriminator_x(tf.stop_gradient(fake_x), training=True)
+            disc_fake_y = self.discriminator_y(tf.stop_gradient(fake_y), training=True)
+            discriminator_losses = self.compute_discriminator_losses(real_x, real_y, disc_fake_x, disc_fake_y)
+            scaled_discriminator_losses = self.scale_losses(discriminator_losses, discriminators_objectives)
+        gradients.update(self.unscaled_gradients(tape, scaled_discriminator_losses, discriminators_objectives))
+        del tape
 
-            discriminator_x_loss = 0.5 * losses.discriminator_loss(disc_real_x, disc_fake_x)
-            discriminator_y_loss = 0.5 * losses.discriminator_loss(disc_real_y, disc_fake_y)
+        for name, (model, optimizer) in {**generators_objectives, **discriminators_objectives}.items():
+            optimizer.apply_gradients(grads_and_vars=zip(gradients[name], model.trainable_variables))
 
-        # Calculate the gradients for generator and discriminator
-        generator_g_gradients = tape.gradient(
-            total_generator_g_loss,
-            self.generator_g.trainable_variables,
-        )
-        generator_f_gradients = tape.gradient(
-            total_generator_f_loss,
-            self.generator_f.trainable_variables,
-        )
+        return {
+            **generator_losses,
+            **discriminator_losses,
+        }
 
-        discriminator_x_gradients = tape.gradient(
-            discriminator_x_loss,
-            self.discriminator_x.trainable_variables,
-        )
-        discriminator_y_gradients = tape.gradient(
-            discriminator_y_loss,
-            self.discriminator_y.trainable_variables,
-        )
+    def compute_losses(self, batch):
+        real_x, real_y = batch
+        generator_losses, _, _, disc_fake_x, disc_fake_y = self.compute_generator_losses(real_x, real_y)
+        discriminator_losses = self.compute_discriminator_losses(real_x, real_y, disc_fake_x, disc_fake_y)
+        return {
+            **generator_losses,
+            **discriminator_losses,
+        }
 
-        # Apply the gradients to the optimizer
-        self.generator_optimizer_g.apply_gradients(zip(generator_g_gradients, self.generator_g.trainable_variables))
+    def compute_generator_losses(self, real_x, real_y):
+        # same_x and same_y are used for identity loss.
+        fake_y, same_y = self.run_generator(self.generator_g, real_x, real_y)
+        fake_x, same_x = self.run_generator(self.generator_f, real_y, real_x)
+
+        cycled_x = self.generator_f(fake_y, training=True)
+        cycled_y = self.generator_g(fake_x, training=True)
+
+        disc_fake_x = self.discriminator_x(fake_x, training=True)
+        disc_fake_y = self.discriminator_y(fake_y, training=True)
+
+        # calculate the loss
+        generator_g_loss = losses.generator_loss(disc_fake_y)
+        generator_f_loss = losses.generator_loss(disc_fake_x)
+
+        cycle_loss_x = losses.cycle_loss(real_x, cycled_x)
+        cycle_loss_y = losses.cycle_loss(real_y, cycled_y)
+
+        total_cycle_loss = cycle_loss_x + cycle_loss_y
+
+        identity_loss_y = losses.identity_loss(real_y, same_y)
+        identity_loss_x = losses.identity_loss(real_x, same_x)
+        # Total generator loss = adversarial loss + cycle loss
+        total_generator_g_loss = generator_g_loss + total_cycle_loss + identity_loss_y
+        total_generator_f_loss = generator_f_loss + total_cycle_loss + identity_loss_x
+
+        generator_losses = {
+            'generator_g_loss':       generator_g_loss,
+            'generator_f_loss':       generator_f_loss,
+            'total_generator_g_loss': total_generator_g_loss,
+            'total_generator_f_loss': total_generator_f_loss,
+            'identity_loss_x':        identity_loss_x,
+            'identity_loss_y':        identity_loss_y,
+            'cycle_loss_x':           cycle_loss_x,
+            'cycle_loss_y':           cycle_loss_y
+        }
+        return generator_losses, fake_x, fake_y, disc_fake_x, disc_fake_y
 
-        self.generator_optimizer_f.apply_gradients(zip(generator_f_gradients, self.generator_f.trainable_variables))
+    def compute_discriminator_losses(self, real_x, real_y, disc_fake_x, disc_fake_y):
+        disc_real_x = self.discriminator_x(real_x, training=True)
+        disc_real_y = self.discriminator_y(real_y, training=True)
 
-        self.discriminator_optimizer_x.apply_gradients(
-            zip(discriminator_x_gradients, self.discriminator_x.trainable_variables)
-        )
+        discriminator_x_loss = 0.5 * losses.discriminator_loss(disc_real_x, disc_fake_x)
+        discriminator_y_loss = 0.5 * losses.discriminator_loss(disc_real_y, disc_fake_y)
 
-        self.discriminator_optimizer_y.apply_gradients(
-            zip(discriminator_y_gradients, self.discriminator_y.trainable_variables)
-        )
         return {
-            'generator_g_loss':     generator_g_loss,
-            'generator_f_loss':     generator_f_loss,
             'discriminator_x_loss': discriminator_x_loss,
             'discriminator_y_loss': discriminator_y_loss,
-            'identity_loss_x':      identity_loss_x,
-            'identity_loss_y':      identity_loss_y,
-            'cycle_loss_x':         cycle_loss_x,
-            'cycle_loss_y':         cycle_loss_y
         }
+
+    def run_generator(self, generator, *inputs):
+        """
+        Runs the generator on each of the inputs. With `batch_generator_calls` the inputs are concatenated
+        along the batch axis and go through the generator in a single call, unless the generator uses batch
+        statistics, which would then be shared by the inputs.
+        """
+        if not self.batch_generator_calls or generator.uses_batch_statistics:
+            return [generator(x, training=True) for x in inputs]
+        outputs = generator(tf.concat(inputs, axis=0), training=True)
+        return tf.split(outputs, num_or_size_splits=[tf.shape(x)[0] for x in inputs], axis=0)
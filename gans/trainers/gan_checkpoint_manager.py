@@ -1,8 +1,11 @@
 import os
 
 import tensorflow as tf
+from tensorflow.python import keras
+from tensorflow.python.training.tracking import base as trackable
 
 from gans.callbacks import callback
+from gans.trainers import async_checkpoint
 from gans.utils import constants
 from gans.utils import logging
 
@@ -16,48 +19,140 @@ class GANCheckpointManager(callback.Callback):
             components_to_save,
             root_checkpoint_path,
             continue_training,
+            save_every_n_steps=100,
+            async_checkpoints=False,
+            save_iterator=False,
     ):
+        """
+        With `async_checkpoints` the variables are copied to host memory and written by a background thread,
+        so training does not wait for the checkpoint files. The write latencies and the failed writes are
+        logged to Tensorboard.
+
+        Checkpoints are saved every `save_every_n_steps` steps and at the end of every epoch, and numbered
+        by global step. Next to the models and the optimizers they hold the global
+        step, the epoch and the step within the epoch.
+
+        With `save_iterator` they also hold the state of the training dataset iterator, so a resumed epoch
+        continues with the next batch instead of restarting its data. The state includes the buffers of the
+        pipeline, e.g. every element waiting in a shuffle buffer, which can make each checkpoint much larger
+        and slower to write.
+        """
+        self.components_to_save = components_to_save
         self.root_checkpoint_path = root_checkpoint_path
         self.continue_training = continue_training
+        self.every_n_steps = save_every_n_steps
+        self.save_iterator = save_iterator
         self.training_checkpoint_path = os.path.join(
             self.root_checkpoint_path,
             constants.CHECKPOINT_DIR,
         )
+        self.global_step = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self.epoch = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self.epoch_step = tf.Variable(0, dtype=tf.int64, trainable=False)
         self.checkpoint = tf.train.Checkpoint(
             **components_to_save,
+            global_step=self.global_step,
+            epoch=self.epoch,
+            epoch_step=self.epoch_step,
         )
         self.checkpoint_manager = tf.train.CheckpointManager(
             checkpoint=self.checkpoint,
             directory=self.training_checkpoint_path,
             max_to_keep=3,
         )
+        self.warned_untracked_iterator = False
+        self.async_writer = None
+        if async_checkpoints:
+            self.async_writer = async_checkpoint.AsyncCheckpointWriter(
+                directory=self.training_checkpoint_path,
+                max_to_keep=3,
+            )
 
     def load_for_predict(self):
-        pass
+        """Restores the models from the latest checkpoint and skips the optimizers and the training progress."""
+        latest_checkpoint = self.latest_checkpoint()
+        models = {name: c for name, c in self.components_to_save.items() if isinstance(c, keras.Model)}
+        tf.train.Checkpoint(**models).restore(latest_checkpoint).expect_partial()
+        log.info(f'Restored models for prediction from checkpoint: {latest_checkpoint}.')
 
     def load_for_train(self):
-        pass
+        """Restores everything saved in the latest checkpoint, failing on objects missing from it."""
+        latest_checkpoint = self.latest_checkpoint()
+        self.checkpoint.restore(latest_checkpoint).assert_existing_objects_matched()
+        log.info(f'Restored training from checkpoint: {latest_checkpoint}.')
+
+    def latest_checkpoint(self):
+        latest_checkpoint = self.checkpoint_manager.latest_checkpoint
+        if latest_checkpoint is None:
+            raise ValueError(f'No checkpoints found in {self.training_checkpoint_path}.')
+        return latest_checkpoint
 
-    def regenerate_training(self):
-        latest_checkpoint_epoch = 0
+    def regenerate_training(self, trainer):
+        """
+        Restores the latest checkpoint and the training progress of the trainer. With `save_iterator` the
+        position of the dataset iterator is restored once the iterator is tracked with `track_iterator`.
+        """
         if self.continue_training:
             latest_checkpoint = self.checkpoint_manager.latest_checkpoint
             if latest_checkpoint is not None:
-                latest_checkpoint_epoch = int(latest_checkpoint[latest_checkpoint.index("-") + 1:])
-                self.checkpoint.restore(self.checkpoint_manager.latest_checkpoint)
-                log.info(f'Training regeneration from checkpoint: {self.root_checkpoint_path}.')
+                self.checkpoint.restore(latest_checkpoint)
+                trainer.global_step = int(self.global_step.numpy())
+                trainer.epoch = int(self.epoch.numpy())
+                trainer.epoch_step = int(self.epoch_step.numpy())
+                log.info(
+                    f'Training regeneration from checkpoint: {latest_checkpoint}, '
+                    f'{trainer.global_step} step and {trainer.epoch} epoch.'
+                )
             else:
                 log.info('No checkpoints found. Starting training from scratch.')
-        return latest_checkpoint_epoch
 
-    def save(self, checkpoint_number):
-        self.checkpoint_manager.save(checkpoint_number=checkpoint_number)
+    def track_iterator(self, iterator):
+        """
+        Saves the position of the iterator with the next checkpoints, or restores it after `regenerate_training`,
+        if `save_iterator` is set.
+        """
+        if not self.save_iterator:
+            return
+        if isinstance(iterator, trackable.Trackable):
+            self.checkpoint.iterator = iterator
+        elif not self.warned_untracked_iterator:
+            self.warned_untracked_iterator = True
+            log.warning('The position of the dataset iterator cannot be saved, resumed epochs restart their data.')
+
+    def save(self, trainer, epoch_completed=False):
+        self.global_step.assign(trainer.global_step)
+        self.epoch.assign(trainer.epoch + int(epoch_completed))
+        self.epoch_step.assign(trainer.epoch_step)
+        if self.async_writer is not None:
+            self.async_writer.save(self.checkpoint, checkpoint_number=trainer.global_step)
+        else:
+            self.checkpoint_manager.save(checkpoint_number=trainer.global_step)
 
     def on_training_step_end(self, trainer):
-        if trainer.global_step % trainer.save_model_every_n_step == 0:
-            self.save(checkpoint_number=trainer.epoch)
-            log.info(f'Saved model for {trainer.global_step} step and {trainer.epoch} epoch.')
+        self.save(trainer)
+        log.info(f'Saved model for {trainer.global_step} step and {trainer.epoch} epoch.')
+        self.report_async_writes(trainer)
 
     def on_epoch_end(self, trainer):
-        self.save(checkpoint_number=trainer.epoch)
-        log.info(f'Saved model for the end of training.')
+        self.save(trainer, epoch_completed=True)
+        log.info(f'Saved model for the end of {trainer.epoch} epoch.')
+
+    def on_training_end(self, trainer):
+        if self.async_writer is not None:
+            self.async_writer.wait()
+            self.report_async_writes(trainer)
+
+    def report_async_writes(self, trainer):
+        if self.async_writer is None:
+            return
+        for prefix, snapshot_seconds, write_seconds in self.async_writer.collect_reports():
+            log.info(f'Wrote checkpoint {prefix} in {write_seconds:.2f}s.')
+            trainer.logger.log_scalars(
+                name='Checkpoints',
+                scalars={
+                    'snapshot_seconds': snapshot_seconds,
+                    'write_seconds':    write_seconds,
+                    'failed_writes':    self.async_writer.num_failures,
+                },
+                step=trainer.global_step,
+            )
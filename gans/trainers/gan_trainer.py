@@ -2,18 +2,23 @@ import os
 from abc import abstractmethod
 from typing import List
 
+import tensorflow as tf
 from tqdm import tqdm
 
 from gans.callbacks import basic_callbacks
 from gans.callbacks import callback
 from gans.callbacks import logger
 from gans.callbacks import saver
+from gans.callbacks import scheduler
 from gans.datasets import abstract_dataset
 from gans.models import model
 from gans.trainers import gan_checkpoint_manager as ckpt_manager
+from gans.trainers import loss_aggregator
 from gans.trainers import optimizers
 from gans.utils import constants
 from gans.utils import logging
+from gans.utils import mixed_precision
+from gans.utils import xla
 
 SEED = 0
 
@@ -37,7 +42,39 @@ class GANTrainer:
             save_model_every_n_step=100,
             callbacks: List[callback.Callback] = None,
             validation_dataset=None,
+            steps_per_execution: int = 1,
+            strategy: tf.distribute.Strategy = None,
+            gradient_accumulation_steps: int = 1,
+            jit_compile: bool = False,
+            async_checkpoints: bool = False,
+            save_iterator: bool = False,
+            log_losses_every_n_steps: int = 100,
+            log_losses_every_n_seconds: float = None,
     ):
+        """
+        To train with a `tf.distribute.Strategy`, the models, the optimizers and the trainer itself
+        have to be created under `strategy.scope()`. Batches of the dataset are then split across
+        the replicas and the losses are summed over the replicas.
+
+        With `gradient_accumulation_steps` larger than one, every batch is split into that many
+        micro-batches which are processed one after another, and their gradients, averaged weighted by
+        the micro-batch sizes, are applied once per batch. Only the activations of a single micro-batch are kept in memory.
+
+        With `jit_compile` the train step and the generators inference are compiled with XLA. If the
+        first call fails to compile, the trainer logs a warning and falls back to the regular graph.
+
+        With `async_checkpoints` the checkpoints are written by a background thread, and with `save_iterator`
+        they hold the position of the dataset iterator, see `GANCheckpointManager`.
+
+        Callbacks are only dispatched when they are due, see `Callback`. An execution of training steps
+        ends at the next step a callback scheduled by steps is due, so a large `steps_per_execution` fuses
+        the steps between the callbacks into single graph calls. Callbacks scheduled by time do not shorten
+        the executions, they run after the first execution ending once their interval has passed, so
+        `steps_per_execution` bounds how late they can be.
+
+        The losses are aggregated on the device and their means, minima and maxima are logged every
+        `log_losses_every_n_steps` steps or `log_losses_every_n_seconds` seconds, whichever comes first.
+        """
         self.batch_size = batch_size
         self.generators = generators
         self.discriminators = discriminators
@@ -48,9 +85,15 @@ class GANTrainer:
         self.num_test_examples = num_test_examples
         self.continue_training = continue_training
         self.validation_dataset = validation_dataset
+        self.steps_per_execution = steps_per_execution
+        self.strategy = strategy or tf.distribute.get_strategy()
+        self.gradient_accumulation_steps = gradient_accumulation_steps
+        self.jit_compile = jit_compile
 
         self.global_step = 0
         self.epoch = 0
+        self.epoch_step = 0
+        self.iterator = None
 
         self.generators_optimizers = generators_optimizers
         self.discriminators_optimizers = discriminators_optimizers
@@ -62,52 +105,336 @@ class GANTrainer:
         self.logger = logger.TensorboardLogger(
             root_checkpoint_path=self.root_checkpoint_path,
         )
-        self.checkpoint_manager = ckpt_manager.GANCheckpointManager(
-            components_to_save={
-                **self.generators_optimizers,
-                **self.discriminators_optimizers,
-                **{k: v.model for k, v in self.generators.items()},
-                **{k: v.model for k, v in self.discriminators.items()}
-            },
-            root_checkpoint_path=self.root_checkpoint_path,
-            continue_training=continue_training,
+        self.check_models_distribution()
+        with self.strategy.scope():
+            self.checkpoint_manager = ckpt_manager.GANCheckpointManager(
+                components_to_save={
+                    **self.generators_optimizers,
+                    **self.discriminators_optimizers,
+                    **{k: v.model for k, v in self.generators.items()},
+                    **{k: v.model for k, v in self.discriminators.items()}
+                },
+                root_checkpoint_path=self.root_checkpoint_path,
+                continue_training=continue_training,
+                save_every_n_steps=save_model_every_n_step,
+                async_checkpoints=async_checkpoints,
+                save_iterator=save_iterator,
+            )
+
+        if jit_compile and self.strategy.num_replicas_in_sync > 1:
+            # Optimizers merge the updates of all replicas, which cannot happen inside a compiled function.
+            log.warning('XLA compilation of the train step is not supported with several replicas.')
+        self.loss_aggregator = loss_aggregator.LossAggregator()
+        self.train_function = xla.FunctionWithFallback(
+            build_function=self.build_train_function,
+            jit_compile=jit_compile and self.strategy.num_replicas_in_sync == 1,
+            name='train step',
         )
+        self.multi_step_train_function = None
+        self.inference_functions = {}
 
         default_callbacks = [
             self.checkpoint_manager,
-            basic_callbacks.GlobalStepIncrementer(),
+            basic_callbacks.PeakMemoryLogger(),
+            basic_callbacks.LossLogger(
+                every_n_steps=log_losses_every_n_steps,
+                every_n_seconds=log_losses_every_n_seconds,
+            ),
         ]
-        self.callbacks = callbacks + default_callbacks
+        self.callbacks = (callbacks or []) + default_callbacks
+        self.callback_scheduler = scheduler.CallbackScheduler(self.callbacks)
 
     @abstractmethod
     def train_step(self, batch):
         raise NotImplementedError
 
+    def optimize(self, compute_losses, batch, objectives):
+        """
+        Computes the gradients of the objectives and applies them with the corresponding optimizers.
+
+        :param compute_losses: function mapping a batch to a dict of losses
+        :param batch: batch of training examples
+        :param objectives: dict mapping a loss name to the (model, optimizer) pair it optimizes
+        :return: dict of losses
+        """
+        if self.gradient_accumulation_steps > 1:
+            losses, gradients = self.accumulate_gradients(compute_losses, batch, objectives)
+        else:
+            losses, gradients = self.compute_gradients(compute_losses, batch, objectives)
+
+        for name, (model, optimizer) in objectives.items():
+            optimizer.apply_gradients(
+                grads_and_vars=zip(gradients[name], model.trainable_variables)
+            )
+        return losses
+
+    @staticmethod
+    def discriminate(discriminator, real_inputs, fake_inputs, batched: bool = False):
+        """
+        Runs the discriminator on real and fake inputs and returns both outputs. With `batched` the inputs
+        are concatenated along the batch axis and go through the discriminator in a single call, unless
+        the discriminator uses batch statistics, which would then be shared by real and fake examples.
+        """
+        if not batched or discriminator.uses_batch_statistics:
+            return discriminator(real_inputs, training=True), discriminator(fake_inputs, training=True)
+        inputs = tf.nest.map_structure(
+            lambda real, fake: tf.concat([real, tf.cast(fake, real.dtype)], axis=0),
+            real_inputs,
+            fake_inputs,
+        )
+        outputs = discriminator(inputs, training=True)
+        return tf.split(outputs, num_or_size_splits=2, axis=0)
+
+    def compute_gradients(self, compute_losses, batch, objectives):
+        with tf.GradientTape(persistent=len(objectives) > 1) as tape:
+            losses = compute_losses(batch)
+            scaled_losses = self.scale_losses(losses, objectives)
+        return losses, self.unscaled_gradients(tape, scaled_losses, objectives)
+
+    @staticmethod
+    def scale_losses(losses, objectives):
+        """Scales the loss of every objective with the loss scale of its own optimizer."""
+        return {
+            name: mixed_precision.scale_loss(losses[name], optimizer)
+            for name, (_, optimizer) in objectives.items()
+        }
+
+    @staticmethod
+    def unscaled_gradients(tape, scaled_losses, objectives):
+        """
+        Takes the gradient of every scaled loss over the variables of its model and unscales it, so each
+        optimizer updates its loss scale from the gradients computed with it.
+        """
+        return {
+            name: mixed_precision.unscale_gradients(
+                tape.gradient(scaled_losses[name], model.trainable_variables),
+                optimizer,
+            )
+            for name, (model, optimizer) in objectives.items()
+        }
+
+    def accumulate_gradients(self, compute_losses, batch, objectives):
+        """
+        Accumulates the losses and the gradients of the micro-batches weighted by their share of the batch,
+        so they equal the losses and the gradients of the whole batch when the losses are batch means, also
+        when the last micro-batch is larger.
+        """
+        num_micro_batches = self.gradient_accumulation_steps
+        losses, gradients = self.compute_micro_batch_gradients(compute_losses, batch, 0, objectives)
+        # Variables without a gradient are accumulated as zeros, but still skipped by the optimizers.
+        missing_gradients = {name: [g is None for g in grads] for name, grads in gradients.items()}
+        gradients = {
+            name: self.dense_gradients(grads, objectives[name][0].trainable_variables)
+            for name, grads in gradients.items()
+        }
+        for i in tf.range(1, num_micro_batches):
+            micro_batch_losses, micro_batch_gradients = self.compute_micro_batch_gradients(
+                compute_losses,
+                batch,
+                i,
+                objectives,
+            )
+            losses = {name: loss + micro_batch_losses[name] for name, loss in losses.items()}
+            gradients = {
+                name: [
+                    g + micro_batch_g for g, micro_batch_g in zip(
+                        grads,
+                        self.dense_gradients(micro_batch_gradients[name], objectives[name][0].trainable_variables),
+                    )
+                ]
+                for name, grads in gradients.items()
+            }
+
+        gradients = {
+            name: [None if missing else g for g, missing in zip(grads, missing_gradients[name])]
+            for name, grads in gradients.items()
+        }
+        return losses, gradients
+
+    def compute_micro_batch_gradients(self, compute_losses, batch, index, objectives):
+        """Computes the losses and the gradients of a micro-batch, weighted by its share of the batch."""
+        micro_batch = self.micro_batch(batch, index)
+        micro_batch_size = tf.cast(self.batch_size_of(micro_batch), tf.float32)
+        weight = micro_batch_size / tf.cast(self.batch_size_of(batch), tf.float32)
+        losses, gradients = self.compute_gradients(compute_losses, micro_batch, objectives)
+        losses = {name: loss * tf.cast(weight, loss.dtype) for name, loss in losses.items()}
+        gradients = {
+            name: [None if g is None else tf.convert_to_tensor(g) * tf.cast(weight, g.dtype) for g in grads]
+            for name, grads in gradients.items()
+        }
+        return losses, gradients
+
+    def micro_batch(self, batch, index):
+        num_micro_batches = self.gradient_accumulation_steps
+        batch_size = self.batch_size_of(batch)
+        micro_batch_size = batch_size // num_micro_batches
+        start = index * micro_batch_size
+        # The last micro-batch takes the remainder of a batch which is not evenly divisible.
+        end = tf.where(index == num_micro_batches - 1, batch_size, start + micro_batch_size)
+        return tf.nest.map_structure(lambda t: t[start:end], batch)
+
+    @staticmethod
+    def batch_size_of(batch):
+        return tf.shape(tf.nest.flatten(batch)[0])[0]
+
+    @staticmethod
+    def dense_gradients(gradients, variables):
+        return [
+            tf.zeros_like(v) if g is None else tf.convert_to_tensor(g)
+            for g, v in zip(gradients, variables)
+        ]
+
     def train(
             self,
             dataset: abstract_dataset.Dataset,
             num_epochs: int,
     ):
-        global_step = 0
-        dataset_tqdm = tqdm(
-            iterable=dataset,
-            desc="Batches",
-            leave=True
-        )
-
-        latest_checkpoint_epoch = self.checkpoint_manager.regenerate_training()
-        latest_epoch = latest_checkpoint_epoch * self.checkpoint_step
-        num_epochs += latest_epoch
-        for self.epoch in tqdm(range(latest_epoch, num_epochs), desc='Epochs'):
+        """
+        Trains until `num_epochs` epochs are completed. A resumed training continues from the epoch and the
+        step of the latest checkpoint, so `num_epochs` counts the epochs completed before it as well.
+        """
+        if self.steps_per_execution > 1:
+            if not isinstance(self.get_train_dataset(dataset), tf.data.Dataset):
+                raise ValueError('Running several steps per execution requires a dataset backed by tf.data.')
+            # Executions are capped by the steps left in the epoch, so none of them runs out of batches
+            # after some of its steps were applied.
+            if self.steps_per_epoch(dataset) is None:
+                raise ValueError('Running several steps per execution requires a dataset of known cardinality.')
+        self.checkpoint_manager.regenerate_training(self)
+        self.iterator = self.make_iterator(dataset)
+        for self.epoch in tqdm(range(self.epoch, num_epochs), desc='Epochs'):
             self.on_epoch_begin()
-            for batch in dataset_tqdm:
-                self.on_training_step_begin()
-                losses = self.train_step(batch)
-                self.on_training_step_end()
-                self.logger.log_scalars(name='Losses', scalars=losses, step=global_step)
-                steps_per_second = 1. / dataset_tqdm.avg_time if dataset_tqdm.avg_time else 0.
-                self.logger.log_scalars(name='', scalars={'steps_per_second': steps_per_second}, step=self.global_step)
+            self.train_epoch(dataset)
+            # The iterator of the next epoch is saved by the checkpoint at the end of this epoch.
+            self.epoch_step = 0
+            self.iterator = self.make_iterator(dataset)
             self.on_epoch_end()
+        self.on_training_end()
+
+    def make_iterator(self, dataset):
+        iterator = iter(self.distribute_dataset(dataset))
+        self.checkpoint_manager.track_iterator(iterator)
+        return iterator
+
+    def train_epoch(self, dataset):
+        steps_per_epoch = self.steps_per_epoch(dataset)
+        dataset_tqdm = tqdm(total=steps_per_epoch, initial=self.epoch_step, desc='Batches', leave=True)
+        remaining_steps = None if steps_per_epoch is None else steps_per_epoch - self.epoch_step
+        while remaining_steps is None or remaining_steps > 0:
+            num_steps = self.steps_per_execution
+            if remaining_steps is not None:
+                num_steps = min(num_steps, remaining_steps)
+            steps_until_due = self.callback_scheduler.steps_until_due(self.global_step)
+            if steps_until_due is not None:
+                num_steps = min(num_steps, steps_until_due)
+            due_callbacks = self.callback_scheduler.due_callbacks(self.global_step, num_steps)
+            self.on_training_step_begin(due_callbacks)
+            try:
+                self.train_steps(self.iterator, num_steps)
+            except (StopIteration, tf.errors.OutOfRangeError):
+                break
+            self.global_step += num_steps
+            self.epoch_step += num_steps
+            self.on_training_step_end(due_callbacks)
+            dataset_tqdm.update(num_steps)
+            if remaining_steps is not None:
+                remaining_steps -= num_steps
+        dataset_tqdm.close()
+
+    def train_steps(self, iterator, num_steps: int):
+        """
+        Runs `num_steps` training steps and returns the losses averaged over them. The losses of every
+        step are also added to `loss_aggregator`.
+
+        A single step is dispatched from Python so any iterable dataset can be used. Several steps are
+        run inside one graph call, which requires an iterator over a `tf.data.Dataset`.
+        """
+        if num_steps == 1 or not self.train_function.verified:
+            # The batch is taken before the first call, so when the step falls back to the regular graph
+            # it runs again on the same batch instead of taking the next one.
+            losses = self.train_function(next(iterator))
+            if num_steps == 1:
+                return losses
+            remaining_losses = self.train_steps(iterator, num_steps - 1)
+            return {
+                name: (loss + remaining_losses[name] * (num_steps - 1)) / num_steps
+                for name, loss in losses.items()
+            }
+        if self.multi_step_train_function is None:
+            self.multi_step_train_function = self.build_multi_step_train_function()
+        return self.multi_step_train_function(iterator, tf.constant(num_steps))
+
+    def build_train_function(self, jit_compile: bool):
+        train_step = xla.compile_function(self.train_step, jit_compile=True) if jit_compile else self.train_step
+
+        @tf.function
+        def distributed_train_step(batch):
+            per_replica_losses = self.strategy.run(train_step, args=(batch,))
+            losses = self.reduce_losses(per_replica_losses)
+            self.loss_aggregator.update(losses)
+            return losses
+
+        return distributed_train_step
+
+    def build_multi_step_train_function(self):
+        # Built once the train step is verified, so it runs the step with or without XLA as it was compiled.
+        distributed_train_step = self.train_function.function
+
+        @tf.function
+        def multi_step_train(iterator, num_steps):
+            losses = distributed_train_step(next(iterator))
+            for _ in tf.range(num_steps - 1):
+                step_losses = distributed_train_step(next(iterator))
+                losses = {name: loss + step_losses[name] for name, loss in losses.items()}
+            return {name: loss / tf.cast(num_steps, loss.dtype) for name, loss in losses.items()}
+
+        return multi_step_train
+
+    def generate(self, generator_name: str, inputs):
+        """Runs inference with one of the generators, compiled with XLA if `jit_compile` is set."""
+        if generator_name not in self.inference_functions:
+            generator = self.generators[generator_name]
+            self.inference_functions[generator_name] = xla.FunctionWithFallback(
+                build_function=lambda jit_compile: xla.compile_function(
+                    lambda x: generator(x, training=False),
+                    jit_compile=jit_compile,
+                ),
+                jit_compile=self.jit_compile,
+                name=f'{generator_name} inference',
+            )
+        return self.inference_functions[generator_name](inputs)
+
+    def reduce_losses(self, per_replica_losses):
+        return {
+            name: self.strategy.reduce(tf.distribute.ReduceOp.SUM, loss, axis=None)
+            for name, loss in per_replica_losses.items()
+        }
+
+    def distribute_dataset(self, dataset):
+        train_dataset = self.get_train_dataset(dataset)
+        if not isinstance(train_dataset, tf.data.Dataset):
+            return dataset
+        return self.strategy.experimental_distribute_dataset(self.prepare_train_dataset(train_dataset))
+
+    def prepare_train_dataset(self, train_dataset: tf.data.Dataset):
+        """Hook for trainers which consume the batches of the training dataset in a different layout."""
+        return train_dataset
+
+    def check_models_distribution(self):
+        for name, m in {**self.generators, **self.discriminators}.items():
+            if not all(self.strategy.extended.variable_created_in_scope(v) for v in m.model.variables):
+                raise ValueError(f'{name} has to be created under the scope of the training strategy.')
+
+    @staticmethod
+    def get_train_dataset(dataset):
+        return getattr(dataset, 'train_dataset', dataset)
+
+    def steps_per_epoch(self, dataset):
+        train_dataset = self.get_train_dataset(dataset)
+        if not isinstance(train_dataset, tf.data.Dataset):
+            return None
+        cardinality = int(tf.data.experimental.cardinality(self.prepare_train_dataset(train_dataset)))
+        return cardinality if cardinality >= 0 else None
 
     def on_epoch_begin(self):
         for c in self.callbacks:
@@ -117,10 +444,14 @@ class GANTrainer:
         for c in self.callbacks:
             c.on_epoch_end(self)
 
-    def on_training_step_begin(self):
-        for c in self.callbacks:
+    def on_training_step_begin(self, due_callbacks=None):
+        for c in self.callbacks if due_callbacks is None else due_callbacks:
             c.on_training_step_begin(self)
 
-    def on_training_step_end(self):
-        for c in self.callbacks:
+    def on_training_step_end(self, due_callbacks=None):
+        for c in self.callbacks if due_callbacks is None else due_callbacks:
             c.on_training_step_end(self)
+
+    def on_training_end(self):
+        for c in self.callbacks:
+            c.on_training_end(self)
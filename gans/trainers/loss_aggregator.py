@@ -0,0 +1,60 @@
+import tensorflow as tf
+
+
+class LossAggregator:
+    """
+    Accumulates the losses of every training step into running sums, minima and maxima kept in variables
+    on the device. The train functions call `update` after every step, so the training loop does not wait
+    for the losses to be copied to the host. The means, minima and maxima are read at once by `flush`.
+    """
+
+    def __init__(self):
+        self.sums = {}
+        self.minima = {}
+        self.maxima = {}
+        self.count = None
+
+    def update(self, losses):
+        """Adds the losses of a single training step."""
+        if self.count is None:
+            self.create_aggregates(losses)
+        for name, loss in losses.items():
+            loss = tf.cast(loss, tf.float32)
+            self.sums[name].assign_add(loss)
+            self.minima[name].assign(tf.minimum(self.minima[name], loss))
+            self.maxima[name].assign(tf.maximum(self.maxima[name], loss))
+        self.count.assign_add(1.0)
+
+    def flush(self):
+        """Returns the means, minima and maxima of the losses since the last flush, empty if there were none."""
+        if self.count is None:
+            return {}
+        count, aggregates = self.read_and_reset_aggregates()
+        if count == 0:
+            return {}
+        return {name: float(value) for name, value in aggregates.items()}
+
+    def create_aggregates(self, losses):
+        # The first update can be traced inside a train function, the variables are created outside of it.
+        with tf.init_scope():
+            for name in losses:
+                self.sums[name] = tf.Variable(0.0, trainable=False)
+                self.minima[name] = tf.Variable(float('inf'), trainable=False)
+                self.maxima[name] = tf.Variable(float('-inf'), trainable=False)
+            self.count = tf.Variable(0.0, trainable=False)
+
+    @tf.function
+    def read_and_reset_aggregates(self):
+        count = tf.identity(self.count)
+        aggregates = {}
+        for name in self.sums:
+            aggregates[name] = self.sums[name] / tf.maximum(count, 1.0)
+            aggregates[f'{name}_min'] = tf.identity(self.minima[name])
+            aggregates[f'{name}_max'] = tf.identity(self.maxima[name])
+        # The function runs the stateful operations in order, so the aggregates are read before the reset.
+        for name in self.sums:
+            self.sums[name].assign(0.0)
+            self.minima[name].assign(float('inf'))
+            self.maxima[name].assign(float('-inf'))
+        self.count.assign(0.0)
+        return count, aggregates
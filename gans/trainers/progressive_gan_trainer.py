@@ -16,6 +16,7 @@ class ProgressiveGANTrainer(gan_trainer.GANTrainer):
             checkpoint_step=10,
             validation_dataset=None,
             callbacks=None,
+            **kwargs,
     ):
         super().__init__(
             batch_size=batch_size,
@@ -29,6 +30,7 @@ class ProgressiveGANTrainer(gan_trainer.GANTrainer):
             checkpoint_step=checkpoint_step,
             validation_dataset=validation_dataset,
             callbacks=callbacks,
+            **kwargs,
         )
 
     def train_step(self, batch):
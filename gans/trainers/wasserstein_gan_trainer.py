@@ -3,6 +3,7 @@ import tensorflow as tf
 from gans.layers import losses
 from gans.models import model
 from gans.trainers import gan_trainer
+from gans.utils import mixed_precision
 
 SEED = 0
 
@@ -22,17 +23,20 @@ class WassersteinGANTrainer(gan_trainer.GANTrainer):
             save_images_every_n_steps: int,
             n_critic=5,
             gp_weight=10.0,
+            fuse_discriminator_passes=False,
             checkpoint_step=10,
             validation_dataset=None,
             callbacks=None,
+            **kwargs,
     ):
         self.generator = generator
         self.discriminator = discriminator
-        self.generator_optimizer = generator_optimizer
-        self.discriminator_optimizer = discriminator_optimizer
+        self.generator_optimizer = mixed_precision.loss_scale_optimizer(generator_optimizer)
+        self.discriminator_optimizer = mixed_precision.loss_scale_optimizer(discriminator_optimizer)
         self.latent_size = latent_size
         self.n_critic = n_critic
         self.gp_weight = gp_weight
+        self.fuse_discriminator_passes = fuse_discriminator_passes
         super().__init__(
             batch_size=batch_size,
             generators={'generator': generator},
@@ -49,63 +53,149 @@ class WassersteinGANTrainer(gan_trainer.GANTrainer):
             checkpoint_step=checkpoint_step,
             validation_dataset=validation_dataset,
             callbacks=callbacks,
+            **kwargs,
+        )
+
+    def prepare_train_dataset(self, train_dataset):
+        """
+        Groups `n_critic` consecutive batches, so every generator update is preceded by critic updates
+        on distinct real batches. Batches are stacked along the second axis, i.e. [batch_size, n_critic, ...],
+        so that a distribution strategy still splits them along the examples. Incomplete batches are dropped.
+        The number of groups stays known, so epochs have a fixed number of steps.
+        """
+        if train_dataset.element_spec.shape[0] == self.batch_size:
+            return self.group_batches(train_dataset)
+
+        cardinality = int(tf.data.experimental.cardinality(train_dataset))
+        grouped_batches = self.group_batches(train_dataset.filter(
+            lambda x: tf.shape(x)[0] == self.batch_size
+        ))
+        if cardinality == tf.data.experimental.INFINITE_CARDINALITY:
+            return grouped_batches.apply(tf.data.experimental.assert_cardinality(cardinality))
+        if cardinality < 0:
+            return grouped_batches
+        # The filter hides the number of batches. Only the last batch can be incomplete, so at least
+        # `cardinality - 1` batches are complete.
+        num_groups = (cardinality - 1) // self.n_critic
+        return grouped_batches.take(
+            num_groups,
+        ).apply(
+            tf.data.experimental.assert_cardinality(num_groups),
+        )
+
+    def group_batches(self, train_dataset):
+        return train_dataset.batch(
+            self.n_critic,
+            drop_remainder=True,
+        ).map(
+            lambda x: tf.transpose(x, perm=[1, 0] + list(range(2, x.shape.rank))),
+            num_parallel_calls=tf.data.experimental.AUTOTUNE,
         )
 
-    @tf.function
     def train_step(self, batch):
-        real_examples = batch
+        real_batches = batch
+
+        # Optimizers merge the updates of all replicas, which cannot happen inside a graph loop, so
+        # the critic loop is only unrolled when training on several replicas.
+        if self.strategy.num_replicas_in_sync > 1:
+            critic_iterations = range(1, self.n_critic)
+        else:
+            critic_iterations = tf.range(1, self.n_critic)
+
+        discriminator_losses = self.critic_step(real_batches[:, 0])
+        for i in critic_iterations:
+            discriminator_losses = self.critic_step(real_batches[:, i])
+
+        generator_losses = self.optimize(
+            compute_losses=self.compute_generator_losses,
+            batch=real_batches[:, -1],
+            objectives={
+                'generator_loss': (self.generator, self.generator_optimizer),
+            },
+        )
 
-        for _ in range(self.n_critic):
-            generator_inputs = tf.random.normal([self.batch_size, self.latent_size])
-            with tf.GradientTape(persistent=True) as tape:
-                fake_examples = self.generator(generator_inputs, training=True)
+        return {
+            **generator_losses,
+            **discriminator_losses,
+        }
 
-                real_output = self.discriminator(real_examples, training=True)
-                fake_output = self.discriminator(fake_examples, training=True)
+    def critic_step(self, real_examples):
+        # A discriminator using batch statistics would share them between the real, fake and interpolated
+        # examples, which changes the gradient penalty, so it keeps separate calls.
+        if self.fuse_discriminator_passes and not self.discriminator.uses_batch_statistics:
+            compute_losses = self.compute_fused_discriminator_losses
+        else:
+            compute_losses = self.compute_discriminator_losses
+        return self.optimize(
+            compute_losses=compute_losses,
+            batch=real_examples,
+            objectives={
+                'discriminator_loss': (self.discriminator, self.discriminator_optimizer),
+            },
+        )
 
-                discriminator_loss = losses.discriminator_loss(real_output, fake_output)
-                gradient_penalty = self.gradient_penalty(real_examples, fake_examples)
-                discriminator_loss = discriminator_loss + gradient_penalty * self.gp_weight
+    def compute_discriminator_losses(self, batch):
+        real_examples = batch
+        generator_inputs = tf.random.normal([tf.shape(real_examples)[0], self.latent_size])
+        fake_examples = self.generator(generator_inputs, training=True)
 
-            gradients_of_discriminator = tape.gradient(
-                target=discriminator_loss,
-                sources=self.discriminator.trainable_variables,
-            )
-            self.discriminator_optimizer.apply_gradients(
-                grads_and_vars=zip(gradients_of_discriminator, self.discriminator.trainable_variables)
-            )
+        real_output = self.discriminator(real_examples, training=True)
+        fake_output = self.discriminator(fake_examples, training=True)
 
-        generator_inputs = tf.random.normal([self.batch_size, self.latent_size])
-        with tf.GradientTape(persistent=True) as tape:
-            fake_examples = self.generator(generator_inputs, training=True)
-            fake_output = self.discriminator(fake_examples, training=True)
-            generator_loss = losses.generator_loss(fake_output)
+        discriminator_loss = losses.discriminator_loss(real_output, fake_output)
+        gradient_penalty = self.gradient_penalty(real_examples, fake_examples)
+        discriminator_loss = discriminator_loss + gradient_penalty * self.gp_weight
+        return {
+            'discriminator_loss': discriminator_loss,
+            'gradient_penalty':   gradient_penalty,
+        }
 
-        gradients_of_generator = tape.gradient(
-            target=generator_loss,
-            sources=self.generator.trainable_variables,
-        )
+    def compute_fused_discriminator_losses(self, batch):
+        """
+        Same losses as `compute_discriminator_losses`, but the real, fake and interpolated examples go
+        through the discriminator in a single call. It is only used for discriminators which do not mix the
+        examples of a batch, as the gradients w.r.t. the interpolated examples are taken from their part
+        of the output only.
+        """
+        real_examples = batch
+        batch_size = tf.shape(real_examples)[0]
+        generator_inputs = tf.random.normal([batch_size, self.latent_size])
+        fake_examples = self.generator(generator_inputs, training=True)
+        interpolated = self.interpolate(real_examples, fake_examples)
 
-        self.generator_optimizer.apply_gradients(
-            grads_and_vars=zip(gradients_of_generator, self.generator.trainable_variables)
-        )
+        with tf.GradientTape() as tape:
+            tape.watch(interpolated)
+            outputs = self.discriminator(
+                tf.concat([real_examples, fake_examples, interpolated], axis=0),
+                training=True,
+            )
+            real_output, fake_output, interpolated_output = tf.split(outputs, num_or_size_splits=3, axis=0)
 
+        grads = tape.gradient(interpolated_output, [interpolated])[0]
+        gradient_penalty = self.penalize_gradients(grads)
+        discriminator_loss = losses.discriminator_loss(real_output, fake_output)
+        discriminator_loss = discriminator_loss + gradient_penalty * self.gp_weight
         return {
-            'generator_loss':     generator_loss,
             'discriminator_loss': discriminator_loss,
             'gradient_penalty':   gradient_penalty,
         }
 
+    def compute_generator_losses(self, batch):
+        generator_inputs = tf.random.normal([tf.shape(batch)[0], self.latent_size])
+        fake_examples = self.generator(generator_inputs, training=True)
+        fake_output = self.discriminator(fake_examples, training=True)
+        generator_loss = losses.generator_loss(fake_output)
+        return {
+            'generator_loss': generator_loss,
+        }
+
     def gradient_penalty(self, real_examples, fake_examples):
         """ Calculates the gradient penalty.
 
         This loss is calculated on an interpolated image
         and added to the discriminator loss.
         """
-        # get the interplated image
-        alpha = tf.random.normal([self.batch_size, 1, 1, 1], 0.0, 1.0)
-        diff = fake_examples - real_examples
-        interpolated = real_examples + alpha * diff
+        interpolated = self.interpolate(real_examples, fake_examples)
 
         with tf.GradientTape() as tape:
             tape.watch(interpolated)
@@ -114,7 +204,18 @@ class WassersteinGANTrainer(gan_trainer.GANTrainer):
 
         # 2. Calculate the gradients w.r.t to this interpolated image.
         grads = tape.gradient(pred, [interpolated])[0]
-        # 3. Calcuate the norm of the gradients
+        return self.penalize_gradients(grads)
+
+    @staticmethod
+    def interpolate(real_examples, fake_examples):
+        # get the interplated image
+        alpha = tf.random.normal([tf.shape(real_examples)[0], 1, 1, 1], 0.0, 1.0)
+        diff = fake_examples - real_examples
+        return real_examples + alpha * diff
+
+    @staticmethod
+    def penalize_gradients(grads):
+        # Calcuate the norm of the gradients
         norm = tf.sqrt(tf.reduce_sum(tf.square(grads), axis=[1, 2, 3]))
-        gp = tf.reduce_mean((norm - 1.0) ** 2)
+        gp = losses.average_over_batch((norm - 1.0) ** 2)
         return gp
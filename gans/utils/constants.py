@@ -1,2 +1,3 @@
 SAVE_IMAGE_DIR = "./outputs"
 CHECKPOINT_DIR = 'training_checkpoints'
+DATASET_CACHE_DIR = './datasets_cache'
@@ -0,0 +1,18 @@
+import tensorflow as tf
+
+
+def split_cpu_into_logical_devices(num_devices: int):
+    """
+    Splits the physical CPU into several logical devices, so data parallel training
+    with `tf.distribute.MirroredStrategy` can spread the replicas across the cores of a
+    single host. It has to be called before the TensorFlow runtime is initialized.
+
+    :param num_devices: number of logical CPU devices to create
+    :return: names of the logical CPU devices
+    """
+    physical_cpus = tf.config.experimental.list_physical_devices('CPU')
+    tf.config.experimental.set_virtual_device_configuration(
+        physical_cpus[0],
+        [tf.config.experimental.VirtualDeviceConfiguration() for _ in range(num_devices)],
+    )
+    return [device.name for device in tf.config.experimental.list_logical_devices('CPU')]
@@ -0,0 +1,60 @@
+import tensorflow as tf
+from tensorflow.keras.mixed_precision import experimental as mixed_precision
+
+from gans.utils import logging
+
+MIXED_FLOAT16 = 'mixed_float16'
+MIXED_BFLOAT16 = 'mixed_bfloat16'
+
+log = logging.get_logger(__name__)
+
+
+def default_policy_name():
+    """
+    Picks the mixed precision policy supported by the available hardware: float16 compute on GPUs
+    and bfloat16 compute on CPUs.
+    """
+    if tf.config.experimental.list_physical_devices('GPU'):
+        return MIXED_FLOAT16
+    return MIXED_BFLOAT16
+
+
+def set_policy(policy_name=None):
+    """
+    Enables mixed precision training. It has to be called before the generators and the discriminators
+    are built, since Keras layers pick up the global policy when they are created.
+
+    :param policy_name: name of a Keras mixed precision policy, chosen based on the hardware if not given
+    :return: the global policy
+    """
+    policy = mixed_precision.Policy(policy_name or default_policy_name())
+    mixed_precision.set_policy(policy)
+    log.info(f'Mixed precision policy: {policy.name}, loss scale: {policy.loss_scale}.')
+    return policy
+
+
+def global_policy():
+    return mixed_precision.global_policy()
+
+
+def loss_scale_optimizer(optimizer):
+    """
+    Wraps the optimizer with loss scaling if the global policy requires it, i.e. for float16 compute.
+    Every model gets its own optimizer, so each one keeps its own dynamic loss scale.
+    """
+    loss_scale = mixed_precision.global_policy().loss_scale
+    if loss_scale is None or isinstance(optimizer, mixed_precision.LossScaleOptimizer):
+        return optimizer
+    return mixed_precision.LossScaleOptimizer(optimizer, loss_scale=loss_scale)
+
+
+def scale_loss(loss, optimizer):
+    if isinstance(optimizer, mixed_precision.LossScaleOptimizer):
+        return optimizer.get_scaled_loss(loss)
+    return loss
+
+
+def unscale_gradients(gradients, optimizer):
+    if isinstance(optimizer, mixed_precision.LossScaleOptimizer):
+        return optimizer.get_unscaled_gradients(gradients)
+    return gradients
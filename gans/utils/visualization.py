@@ -7,36 +7,43 @@ import imageio
 import numpy as np
 import tensorflow as tf
 from IPython import display
+from matplotlib import figure
 from matplotlib import pyplot as plt
+from matplotlib.backends import backend_agg
 
 from gans.utils import constants
 
 
-def make_gif_from_images(path, anim_file='dcgan.gif'):
+def make_gif_from_images(path, anim_file='dcgan.gif', pattern='image*.png'):
+    """
+    :param pattern: glob pattern of the images, e.g. 'generator_f_image*.png' for the images saved by
+        `ImageProblemSaver` for a single generator
+    """
     with imageio.get_writer(anim_file, mode='I') as writer:
-        filenames = glob.glob(os.path.join(path, 'image*.png'))
+        filenames = glob.glob(os.path.join(path, pattern))
         if not filenames:
             raise ValueError('Empty list of files to plot.')
         filenames = sorted(filenames, key=lambda s: int(s.split('_')[-1].replace('.png', '')))
-        last = -1
+        image = None
         for i, filename in enumerate(filenames):
-            frame = 2 * (i ** 0.5)
-            if round(frame) > round(last):
-                last = frame
-            else:
+            if not is_animation_frame(i):
                 continue
+            image = imageio.imread(filename)
             for _ in range(2):
-                # frame = 2 * (i ** 0.5)
-                # if round(frame) > round(last):
-                #     last = frame
-                # else:
-                #     continue
-                image = imageio.imread(filename)
                 writer.append_data(image)
-        image = imageio.imread(filename)
+        if not is_animation_frame(len(filenames) - 1):
+            image = imageio.imread(filenames[-1])
         writer.append_data(image)
 
 
+def is_animation_frame(index):
+    """
+    Selects the frames of an animation at square root spaced indices, so it does not slow down
+    as the training converges.
+    """
+    return index == 0 or round(2 * index ** 0.5) > round(2 * (index - 1) ** 0.5)
+
+
 def display_image(epoch_no):
     return PIL.Image.open('image_at_epoch_{:04d}.png'.format(epoch_no))
 
@@ -48,29 +55,77 @@ def generate_and_save_images_for_image_problems(
         save_path,
         cmap=None,
         num_examples_to_display=16,
+        predictions=None,
 ):
-    display.clear_output(wait=True)
-    predictions = generator_model(test_input, training=False)
+    if predictions is None:
+        predictions = generator_model(test_input, training=False)
+    grid, _ = save_image_grid(
+        predictions=predictions,
+        save_path=save_path,
+        step=epoch,
+        num_examples_to_display=num_examples_to_display,
+    )
+    return grid
+
+
+def save_image_grid(
+        predictions,
+        save_path,
+        step,
+        num_examples_to_display=16,
+        scale=1.0,
+        name='image',
+):
+    """
+    Tiles the predictions into a grid, encodes it as a PNG and writes it to `save_path`, as
+    `<name>_at_epoch_<step>.png`.
+
+    :return: the grid as an uint8 array of shape [height, width, channels] and its PNG encoding
+    """
     if predictions.shape[0] < num_examples_to_display:
         raise ValueError("Input batch size cannot be less than number of example to display.")
-
-    n = int(math.sqrt(num_examples_to_display))
-
-    for i in range(num_examples_to_display):
-        plt.subplot(n, n, i + 1)
-        if generator_model.num_channels == 3:
-            img_to_plot = predictions[i, :, :, :] * 127.5 + 127.5
-        else:
-            img_to_plot = predictions[i, :, :, 0] * 127.5 + 127.5
-        plt.imshow(img_to_plot / 255, cmap=cmap)
-        plt.axis('off')
-
-    # save_path = os.path.join(constants.SAVE_IMAGE_DIR, dataset_name)
+    grid = image_grid(predictions[:num_examples_to_display], scale=scale)
+    encoded_image = encode_png(grid)
     os.makedirs(save_path, exist_ok=True)
-    plt.savefig(os.path.join(save_path, 'image_at_epoch_{:04d}.png'.format(epoch)))
-    im = np.asarray(
-        PIL.Image.open(os.path.join(save_path, 'image_at_epoch_{:04d}.png'.format(epoch))))
-    return im
+    with open(os.path.join(save_path, '{}_at_epoch_{:04d}.png'.format(name, step)), 'wb') as f:
+        f.write(encoded_image)
+    return grid, encoded_image
+
+
+def image_grid(images, num_columns=None, scale=1.0):
+    """
+    Tiles a batch of images normalized to [-1, 1] into a single uint8 image at their native resolution.
+    Missing cells of the last row are left black.
+
+    :param images: array or tensor of shape [num_images, height, width, channels]
+    :param num_columns: number of columns of the grid, the square root of the number of images by default
+    :param scale: factor the grid is resized with, e.g. 0.5 for thumbnails
+    :return: uint8 array of shape [rows * height * scale, columns * width * scale, channels]
+    """
+    images = np.asarray(images, dtype=np.float32)
+    num_images, height, width, num_channels = images.shape
+    if num_columns is None:
+        num_columns = int(math.ceil(math.sqrt(num_images)))
+    num_rows = int(math.ceil(num_images / num_columns))
+
+    images = np.clip(np.rint(images * 127.5 + 127.5), 0, 255).astype(np.uint8)
+    padding = np.zeros((num_rows * num_columns - num_images, height, width, num_channels), dtype=np.uint8)
+    grid = np.concatenate([images, padding], axis=0).reshape(
+        (num_rows, num_columns, height, width, num_channels),
+    ).transpose(
+        (0, 2, 1, 3, 4),
+    ).reshape(
+        (num_rows * height, num_columns * width, num_channels),
+    )
+    if scale != 1.0:
+        size = (max(1, int(round(grid.shape[0] * scale))), max(1, int(round(grid.shape[1] * scale))))
+        grid = tf.image.resize(grid, size=size, method=tf.image.ResizeMethod.AREA)
+        grid = np.clip(np.rint(grid.numpy()), 0, 255).astype(np.uint8)
+    return grid
+
+
+def encode_png(image):
+    return tf.io.encode_png(image).numpy()
 
 
 def generate_and_save_images_for_model_fn_problems(
@@ -80,23 +135,43 @@ def generate_and_save_images_for_model_fn_problems(
         training_name,
         cmap=None,
         num_examples_to_display=16,
+        predictions=None,
 ):
     display.clear_output(wait=True)
-    predictions = generator_model(test_input, training=False)
-    x = tf.random.uniform(shape=[5000], minval=-10, maxval=10)
-    y = tf.nn.sigmoid(x)
-    # y = tf.exp(-0.5 * x ** 2)
-    plt.scatter(x, y, cmap='Reds')
-    plt.scatter(predictions[:, 0], predictions[:, 1], cmap='Greens')
-    plt.grid()
+    if predictions is None:
+        predictions = generator_model(test_input, training=False)
+    return save_function_plot(
+        predictions=predictions,
+        save_path=os.path.join(constants.SAVE_IMAGE_DIR, training_name),
+        step=epoch,
+    )
+
+
+def save_function_plot(
+        predictions,
+        save_path,
+        step,
+):
+    """
+    Plots the predictions of a function problem over the target function and writes the plot to `save_path`.
+    The plot is drawn on its own figure instead of the global pyplot state, so it can be called from a
+    background thread.
+
+    :return: the plot as an uint8 RGBA array of shape [height, width, 4]
+    """
+    x = np.random.uniform(low=-10, high=10, size=5000)
+    y = 1 / (1 + np.exp(-x))
+    fig = figure.Figure()
+    canvas = backend_agg.FigureCanvasAgg(fig)
+    axes = fig.add_subplot(1, 1, 1)
+    axes.scatter(x, y, cmap='Reds')
+    axes.scatter(predictions[:, 0], predictions[:, 1], cmap='Greens')
+    axes.grid()
 
-    save_path = os.path.join(constants.SAVE_IMAGE_DIR, training_name)
     os.makedirs(save_path, exist_ok=True)
-    plt.savefig(os.path.join(save_path, 'image_at_epoch_{:04d}.png'.format(epoch)))
-    im = np.asarray(
-        PIL.Image.open(os.path.join(save_path, 'image_at_epoch_{:04d}.png'.format(epoch))))
-    plt.clf()
-    return im
+    fig.savefig(os.path.join(save_path, 'image_at_epoch_{:04d}.png'.format(step)))
+    canvas.draw()
+    return np.array(canvas.buffer_rgba())
 
 
 def generate_images(
@@ -0,0 +1,49 @@
+import tensorflow as tf
+
+from gans.utils import logging
+
+COMPILATION_ERRORS = (tf.errors.InvalidArgumentError, tf.errors.UnimplementedError)
+
+log = logging.get_logger(__name__)
+
+
+class FunctionWithFallback:
+    """
+    Calls a function compiled with XLA and rebuilds it without XLA if its first call fails to compile,
+    e.g. because one of the models uses an op that has no XLA kernel. The rebuilt function is called again
+    with the same arguments, so a function verified by its first call should not consume its inputs, e.g.
+    take batches from an iterator.
+
+    :param build_function: callable taking `jit_compile` and returning the function to call
+    :param jit_compile: whether to try compiling the function with XLA
+    :param name: name used in the warning logged on fallback
+    """
+
+    def __init__(
+            self,
+            build_function,
+            jit_compile: bool,
+            name: str,
+    ):
+        self.build_function = build_function
+        self.jit_compile = jit_compile
+        self.name = name
+        self.function = build_function(jit_compile)
+        self.verified = not jit_compile
+
+    def __call__(self, *args):
+        if self.verified:
+            return self.function(*args)
+        try:
+            outputs = self.function(*args)
+        except COMPILATION_ERRORS as e:
+            log.warning(f'Could not compile the {self.name} with XLA, falling back to the regular graph: {e.message}')
+            self.jit_compile = False
+            self.function = self.build_function(False)
+            outputs = self.function(*args)
+        self.verified = True
+        return outputs
+
+
+def compile_function(function, jit_compile: bool):
+    return tf.function(function, experimental_compile=jit_compile)
@@ -5,6 +5,7 @@ from gans.datasets import problem_type
 from gans.models import model_factories
 from gans.utils import config
 from gans.utils import logging
+from gans.utils import mixed_precision
 
 logger = logging.get_logger(__name__)
 
@@ -15,6 +16,8 @@ def run_experiment(input_args):
     gan_type = problem_type.split('_')[0]
     problem_params = config.read_config(problem_type)
     logger.info(f'Loaded parameters: \n {problem_params}')
+    if problem_params.get('mixed_precision', False):
+        mixed_precision.set_policy(problem_params.get('mixed_precision_policy'))
     dataset = dataset_factory.get_dataset(problem_params, problem_type)
     logger.info(f'Loaded dataset: {dataset}')
     gan_model = model_factories.gan_model_factory(problem_params, gan_type, input_args)
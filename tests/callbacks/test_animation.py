@@ -0,0 +1,36 @@
+import os
+from unittest import mock
+
+import numpy as np
+import tensorflow as tf
+
+from gans.callbacks import animation
+
+
+class TestAnimationWriter(tf.test.TestCase):
+
+    def test_frames_are_selected_at_square_root_spaced_indices(self):
+        anim_file = os.path.join(self.get_temp_dir(), 'progress.gif')
+        writer = animation.AnimationWriter(anim_file, frame_repeats=2)
+
+        with mock.patch.object(animation.imageio, 'get_writer') as get_writer:
+            for i in range(6):
+                writer.add_frame(np.full([4, 4, 1], i, dtype=np.uint8))
+            writer.close()
+
+        get_writer.assert_called_once_with(anim_file, mode='I')
+        appended_frames = [
+            call[0][0] for call in get_writer.return_value.append_data.call_args_list
+        ]
+        self.assertEqual([int(frame[0, 0]) for frame in appended_frames], [0, 0, 1, 1, 2, 2, 4, 4, 5])
+        self.assertEqual(appended_frames[0].shape, (4, 4))
+        get_writer.return_value.close.assert_called_once()
+
+    def test_frames_cannot_be_added_after_closing(self):
+        writer = animation.AnimationWriter(os.path.join(self.get_temp_dir(), 'progress.gif'))
+
+        with mock.patch.object(animation.imageio, 'get_writer'):
+            writer.add_frame(np.zeros([4, 4, 3], dtype=np.uint8))
+            writer.close()
+            with self.assertRaises(ValueError):
+                writer.add_frame(np.zeros([4, 4, 3], dtype=np.uint8))
@@ -0,0 +1,40 @@
+import threading
+
+import tensorflow as tf
+
+from gans.callbacks import background_worker
+
+
+class TestBackgroundWorker(tf.test.TestCase):
+
+    def test_tasks_are_dropped_when_the_queue_is_full(self):
+        worker = background_worker.BackgroundWorker(max_pending=1)
+        started, release = threading.Event(), threading.Event()
+        done = []
+
+        def blocking_task():
+            started.set()
+            release.wait()
+            done.append('blocking')
+
+        self.assertTrue(worker.submit(blocking_task))
+        started.wait()
+        self.assertTrue(worker.submit(done.append, 'queued'))
+        self.assertFalse(worker.submit(done.append, 'dropped'))
+        release.set()
+        worker.flush()
+
+        self.assertEqual(done, ['blocking', 'queued'])
+        self.assertEqual(worker.num_submitted, 3)
+        self.assertEqual(worker.num_dropped, 1)
+
+    def test_failed_tasks_do_not_stop_the_worker(self):
+        worker = background_worker.BackgroundWorker()
+        done = []
+
+        worker.submit(lambda: 1 / 0)
+        worker.submit(done.append, 'after failure')
+        worker.flush()
+
+        self.assertEqual(done, ['after failure'])
+        self.assertEqual(worker.num_failed, 1)
@@ -0,0 +1,57 @@
+from unittest import mock
+
+import tensorflow as tf
+
+from gans.callbacks import callback
+from gans.callbacks import scheduler
+
+
+class StepCallback(callback.Callback):
+
+    def __init__(self, every_n_steps=None, every_n_seconds=None):
+        self.every_n_steps = every_n_steps
+        self.every_n_seconds = every_n_seconds
+
+    def on_training_step_end(self, trainer):
+        pass
+
+
+class EpochCallback(callback.Callback):
+
+    def on_epoch_end(self, trainer):
+        pass
+
+
+class TestCallbackScheduler(tf.test.TestCase):
+
+    def test_callbacks_are_due_when_a_multiple_of_their_steps_is_completed(self):
+        every_step, every_3_steps = StepCallback(), StepCallback(every_n_steps=3)
+        callback_scheduler = scheduler.CallbackScheduler([every_step, every_3_steps, EpochCallback()])
+
+        due_per_step = [callback_scheduler.due_callbacks(global_step, num_steps=1) for global_step in range(6)]
+
+        self.assertEqual(
+            due_per_step,
+            [[every_step], [every_step], [every_step, every_3_steps]] * 2,
+        )
+
+    def test_fused_steps_end_at_the_next_due_step(self):
+        callback_scheduler = scheduler.CallbackScheduler([
+            StepCallback(every_n_steps=10),
+            StepCallback(every_n_steps=4),
+            StepCallback(every_n_seconds=1.0),
+        ])
+
+        self.assertEqual(callback_scheduler.steps_until_due(0), 4)
+        self.assertEqual(callback_scheduler.steps_until_due(4), 4)
+        self.assertEqual(callback_scheduler.steps_until_due(9), 1)
+        self.assertIsNone(scheduler.CallbackScheduler([StepCallback()]).steps_until_due(0))
+
+    def test_callbacks_scheduled_by_time_are_due_after_their_interval(self):
+        timed_callback = StepCallback(every_n_seconds=10.0)
+        callback_scheduler = scheduler.CallbackScheduler([timed_callback])
+
+        with mock.patch.object(scheduler.time, 'perf_counter', side_effect=[100.0, 105.0, 110.0]):
+            due = [callback_scheduler.due_callbacks(global_step, num_steps=1) for global_step in range(3)]
+
+        self.assertEqual(due, [[timed_callback], [], [timed_callback]])
@@ -0,0 +1,7 @@
+from gans.utils import devices
+
+# The data parallel tests run a MirroredStrategy over logical CPU devices, which can only be created
+# before the TensorFlow runtime is initialized, so before any test runs.
+NUM_LOGICAL_CPUS = 2
+
+devices.split_cpu_into_logical_devices(NUM_LOGICAL_CPUS)
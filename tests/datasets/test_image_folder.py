@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import tensorflow as tf
+from easydict import EasyDict as edict
+
+from gans.datasets import image_folder
+
+
+class TestImageFolderDataset(tf.test.TestCase):
+
+    def write_images(self, directory, values, size=64):
+        os.makedirs(directory, exist_ok=True)
+        for i, value in enumerate(values):
+            image = tf.fill([size, size, 3], tf.constant(value, dtype=tf.uint8))
+            tf.io.write_file(os.path.join(directory, f'image_{i}.jpg'), tf.io.encode_jpeg(image, quality=100))
+
+    def input_params(self, paired):
+        return edict({
+            'domain_a_dir': os.path.join(self.get_temp_dir(), 'domain_a'),
+            'domain_b_dir': os.path.join(self.get_temp_dir(), 'domain_b'),
+            'paired':       paired,
+            'img_height':   16,
+            'img_width':    16,
+            'num_channels': 3,
+            'batch_size':   3,
+            'buffer_size':  3,
+        })
+
+    def test_unpaired_epoch_covers_the_larger_domain(self):
+        input_params = self.input_params(paired=False)
+        self.write_images(input_params.domain_a_dir, [0, 100, 200])
+        self.write_images(input_params.domain_b_dir, [50, 150])
+
+        batches = list(image_folder.ImageFolderDataset(input_params).train_dataset)
+
+        self.assertLen(batches, 1)
+        images_a, images_b = batches[0]
+        self.assertEqual(images_a.shape, [3, 16, 16, 3])
+        self.assertEqual(images_b.shape, [3, 16, 16, 3])
+        self.assertAllInRange(images_a, -1.0, 1.0)
+        self.assertAllInRange(images_b, -1.0, 1.0)
+        self.assertAllClose(
+            sorted(images_a.numpy()[:, 0, 0, 0]),
+            (np.array([0, 100, 200]) - 127.5) / 127.5,
+            atol=0.05,
+        )
+
+    def test_paired_images_match_by_file_name(self):
+        input_params = self.input_params(paired=True)
+        self.write_images(input_params.domain_a_dir, [0, 100, 200])
+        self.write_images(input_params.domain_b_dir, [20, 120, 220])
+
+        images_a, images_b = next(iter(image_folder.ImageFolderDataset(input_params).train_dataset))
+
+        self.assertEqual(images_a.shape, [3, 16, 16, 3])
+        self.assertAllClose(images_b - images_a, np.full([3, 16, 16, 3], 20 / 127.5), atol=0.05)
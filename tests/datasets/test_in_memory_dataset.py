@@ -0,0 +1,32 @@
+import numpy as np
+import tensorflow as tf
+from easydict import EasyDict as edict
+
+from gans.datasets import in_memory_dataset
+
+
+class ArrayDataset(in_memory_dataset.InMemoryDataset):
+
+    def load_arrays(self):
+        train_images = np.arange(10, dtype=np.uint8).reshape([10, 1, 1, 1]) * 25
+        train_labels = np.arange(10)
+        return train_images, train_labels
+
+
+class TestInMemoryDataset(tf.test.TestCase):
+
+    def test_batches_are_normalized_shuffled_and_complete(self):
+        input_params = edict({
+            'batch_size':  4,
+            'buffer_size': 10,
+        })
+        dataset = ArrayDataset(input_params, with_labels=True)
+
+        batches = list(dataset.train_dataset)
+        images = np.concatenate([images for images, _ in batches])
+        labels = np.concatenate([labels for _, labels in batches])
+
+        self.assertEqual([len(labels) for _, labels in batches], [4, 4, 2])
+        self.assertEqual(images.dtype, np.float32)
+        self.assertAllClose(images[:, 0, 0, 0], (labels * 25 - 127.5) / 127.5)
+        self.assertCountEqual(labels, range(10))
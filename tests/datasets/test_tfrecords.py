@@ -0,0 +1,82 @@
+import numpy as np
+import tensorflow as tf
+from easydict import EasyDict as edict
+
+from gans.datasets import tfrecords
+
+
+class TestTFRecords(tf.test.TestCase):
+
+    def test_read_examples_are_equal_to_written_examples(self):
+        images = (np.arange(12, dtype=np.float32).reshape([6, 1, 1, 2]) * 20 - 127.5) / 127.5
+        labels = np.arange(6, dtype=np.int64)
+        dataset = tf.data.Dataset.from_tensor_slices((images, labels)).batch(4)
+        output_dir = self.get_temp_dir()
+
+        num_examples = tfrecords.write_tfrecords(dataset, output_dir, num_shards=3, compression='GZIP')
+        input_params = edict({
+            'tfrecords_dir': output_dir,
+            'batch_size':    6,
+            'buffer_size':   1,
+            'deterministic': True,
+        })
+        read_images, read_labels = next(iter(tfrecords.TFRecordDataset(input_params).train_dataset))
+
+        self.assertEqual(num_examples, 6)
+        self.assertCountEqual(read_labels.numpy(), labels)
+        self.assertAllClose(read_images, images[read_labels.numpy()])
+
+    def test_workers_read_disjoint_shards_in_a_repeatable_order(self):
+        labels = np.arange(12, dtype=np.int64)
+        dataset = tf.data.Dataset.from_tensor_slices(labels).batch(4)
+        output_dir = self.get_temp_dir()
+        tfrecords.write_tfrecords(dataset, output_dir, num_shards=4)
+
+        def read_labels(worker_index):
+            input_params = edict({
+                'tfrecords_dir': output_dir,
+                'batch_size':    12,
+                'buffer_size':   12,
+                'deterministic': True,
+                'num_workers':   2,
+                'worker_index':  worker_index,
+            })
+            return np.concatenate(list(tfrecords.TFRecordDataset(input_params).train_dataset))
+
+        worker_0_labels, worker_1_labels = read_labels(0), read_labels(1)
+
+        self.assertCountEqual(np.concatenate([worker_0_labels, worker_1_labels]), labels)
+        self.assertAllEqual(read_labels(0), worker_0_labels)
+
+    def test_number_of_batches_is_known(self):
+        dataset = tf.data.Dataset.from_tensor_slices(np.arange(10, dtype=np.int64)).batch(5)
+        output_dir = self.get_temp_dir()
+        tfrecords.write_tfrecords(dataset, output_dir, num_shards=3)
+        input_params = edict({
+            'tfrecords_dir': output_dir,
+            'batch_size':    4,
+            'buffer_size':   10,
+        })
+
+        train_dataset = tfrecords.TFRecordDataset(input_params).train_dataset
+
+        self.assertEqual(int(tf.data.experimental.cardinality(train_dataset)), 3)
+        self.assertLen(list(train_dataset), 3)
+
+    def test_deterministic_examples_are_shuffled_with_a_fixed_seed(self):
+        labels = np.arange(64, dtype=np.int64)
+        dataset = tf.data.Dataset.from_tensor_slices(labels).batch(8)
+        output_dir = self.get_temp_dir()
+        tfrecords.write_tfrecords(dataset, output_dir, num_shards=1)
+        input_params = edict({
+            'tfrecords_dir': output_dir,
+            'batch_size':    64,
+            'buffer_size':   64,
+            'deterministic': True,
+        })
+
+        first_run_labels = next(iter(tfrecords.TFRecordDataset(input_params).train_dataset))
+        second_run_labels = next(iter(tfrecords.TFRecordDataset(input_params).train_dataset))
+
+        self.assertAllEqual(first_run_labels, second_run_labels)
+        self.assertNotAllEqual(first_run_labels, labels)
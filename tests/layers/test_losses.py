@@ -0,0 +1,31 @@
+import tensorflow as tf
+
+from gans.layers import losses
+
+NUM_REPLICAS = 2
+
+
+class TestLosses(tf.test.TestCase):
+
+    def test_average_over_batch_equals_mean(self):
+        per_example_loss = tf.reshape(tf.range(24, dtype=tf.float32), shape=(4, 3, 2))
+        self.assertAllClose(
+            losses.average_over_batch(per_example_loss),
+            tf.reduce_mean(per_example_loss),
+        )
+
+    def test_distributed_generator_loss_equals_single_device_loss(self):
+        logical_devices = tf.config.experimental.list_logical_devices('CPU')
+        if len(logical_devices) < NUM_REPLICAS:
+            self.skipTest('The logical CPU devices are created by tests/conftest.py.')
+        strategy = tf.distribute.MirroredStrategy(
+            devices=[device.name for device in logical_devices[:NUM_REPLICAS]],
+        )
+        fake_output = tf.random.normal(shape=(8, 1))
+        dataset = tf.data.Dataset.from_tensors(fake_output)
+        distributed_fake_output = next(iter(strategy.experimental_distribute_dataset(dataset)))
+
+        per_replica_loss = strategy.run(losses.generator_loss, args=(distributed_fake_output,))
+        distributed_loss = strategy.reduce(tf.distribute.ReduceOp.SUM, per_replica_loss, axis=None)
+
+        self.assertAllClose(distributed_loss, losses.generator_loss(fake_output))
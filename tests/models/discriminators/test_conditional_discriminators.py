@@ -36,3 +36,14 @@ class TestConditionalDiscriminators(tf.test.TestCase):
         expected_shape = (4, 1)
         self.assertEqual(actual_shape, expected_shape)
 
+    def test_only_cifar10_conditional_discriminator_uses_batch_statistics(self):
+        model_parameters = edict({
+            'img_height':   32,
+            'img_width':    32,
+            'num_channels': 3,
+        })
+        d = conditional_discriminator.ConditionalDiscriminator(model_parameters)
+        d_cifar10 = conditional_discriminator.ConditionalDiscriminatorCifar10(model_parameters)
+
+        self.assertFalse(d.uses_batch_statistics)
+        self.assertTrue(d_cifar10.uses_batch_statistics)
@@ -37,3 +37,52 @@ class TestUNetGenerators(tf.test.TestCase):
         actual_shape = output_img.shape
         expected_shape = (4, 256, 256, 3)
         self.assertEqual(actual_shape, expected_shape)
+
+    def test_unet_generator_recomputed_gradients_are_equal(self):
+        model_parameters = edict({
+            'latent_size':  100,
+            'img_height':   64,
+            'img_width':    64,
+            'num_channels': 3,
+
+        })
+        g = unet.UNetGenerator(model_parameters)
+        z = tf.random.normal(shape=[2, 64, 64, 3])
+
+        with tf.GradientTape() as tape:
+            loss = tf.reduce_sum(g(z, training=True))
+        expected_gradients = tape.gradient(loss, g.trainable_variables)
+
+        g.enable_recompute(num_segments=4)
+        with tf.GradientTape() as tape:
+            recomputed_loss = tf.reduce_sum(g(z, training=True))
+        actual_gradients = tape.gradient(recomputed_loss, g.trainable_variables)
+
+        self.assertAllClose(loss, recomputed_loss)
+        for expected, actual in zip(expected_gradients, actual_gradients):
+            self.assertAllClose(expected, actual, rtol=1e-4, atol=1e-4)
+
+    def test_unet_generator_recomputed_gradients_are_equal_in_graph(self):
+        model_parameters = edict({
+            'latent_size':  100,
+            'img_height':   64,
+            'img_width':    64,
+            'num_channels': 3,
+
+        })
+        g = unet.UNetGenerator(model_parameters)
+        z = tf.random.normal(shape=[2, 64, 64, 3])
+
+        def compute_gradients(inputs):
+            with tf.GradientTape() as tape:
+                loss = tf.reduce_sum(g(inputs, training=True))
+            return loss, tape.gradient(loss, g.trainable_variables)
+
+        # The recomputed model is picked when the function is traced, so each case gets its own function.
+        loss, expected_gradients = tf.function(compute_gradients)(z)
+        g.enable_recompute(num_segments=4)
+        recomputed_loss, actual_gradients = tf.function(compute_gradients)(z)
+
+        self.assertAllClose(loss, recomputed_loss)
+        for expected, actual in zip(expected_gradients, actual_gradients):
+            self.assertAllClose(expected, actual, rtol=1e-4, atol=1e-4)
@@ -0,0 +1,52 @@
+import os
+
+import tensorflow as tf
+from easydict import EasyDict as edict
+
+from gans.models import export
+from gans.models.generators.latent_to_image import latent_to_image
+
+
+class TestExport(tf.test.TestCase):
+
+    def test_exported_generator_outputs_are_equal(self):
+        input_params = edict({
+            'latent_size': 100
+        })
+        g = latent_to_image.LatentToImageGenerator(input_params)
+        z = tf.random.normal(shape=[2, 100])
+        export_dir = os.path.join(self.get_temp_dir(), 'generator')
+
+        export.export_generator(g, export_dir)
+        exported_g = export.load_generator(export_dir)
+
+        self.assertAllClose(exported_g(z), g(z, training=False))
+        self.assertGreater(exported_g.load_seconds, 0)
+
+    def test_float16_exported_generator_outputs_are_close(self):
+        input_params = edict({
+            'latent_size': 100
+        })
+        g = latent_to_image.LatentToImageGenerator(input_params)
+        z = tf.random.normal(shape=[2, 100])
+        export_dir = os.path.join(self.get_temp_dir(), 'generator_float16')
+
+        export.export_generator(g, export_dir, float16=True)
+        exported_g = export.load_generator(export_dir)
+
+        self.assertAllClose(exported_g(z), g(z, training=False), atol=1e-2)
+
+    def test_casted_model_has_float16_weights_of_the_model(self):
+        input_params = edict({
+            'latent_size': 100
+        })
+        g = latent_to_image.LatentToImageGenerator(input_params)
+
+        casted_model = export.cast_model(g.model, policy_name='float16')
+
+        # The batch normalization parameters stay in float32.
+        kernels = [w for w in casted_model.weights if 'kernel' in w.name]
+        self.assertNotEmpty(kernels)
+        self.assertTrue(all(kernel.dtype == tf.float16 for kernel in kernels))
+        for weight, casted_weight in zip(g.model.get_weights(), casted_model.get_weights()):
+            self.assertAllClose(casted_weight, weight, atol=1e-2, rtol=1e-3)
@@ -0,0 +1,40 @@
+import tensorflow as tf
+
+from gans.trainers import async_checkpoint
+
+
+class TestAsyncCheckpointWriter(tf.test.TestCase):
+
+    def test_written_checkpoint_restores_snapshot_values(self):
+        directory = self.get_temp_dir()
+        variable = tf.Variable([1.0, 2.0])
+        optimizer = tf.keras.optimizers.Adam()
+        optimizer.apply_gradients([(tf.ones_like(variable), variable)])
+        checkpoint = tf.train.Checkpoint(variable=variable, optimizer=optimizer)
+        writer = async_checkpoint.AsyncCheckpointWriter(directory=directory)
+
+        prefix = writer.save(checkpoint, checkpoint_number=7)
+        expected_value = variable.numpy()
+        variable.assign([5.0, 6.0])
+        writer.wait()
+
+        self.assertEqual(writer.collect_reports()[0][0], prefix)
+        self.assertEqual(tf.train.latest_checkpoint(directory), prefix)
+        checkpoint.restore(prefix).assert_consumed()
+        self.assertAllClose(variable, expected_value)
+
+    def test_keeps_most_recent_checkpoints(self):
+        directory = self.get_temp_dir()
+        checkpoint = tf.train.Checkpoint(variable=tf.Variable(1.0))
+        writer = async_checkpoint.AsyncCheckpointWriter(directory=directory, max_to_keep=2)
+
+        for checkpoint_number in range(4):
+            writer.save(checkpoint, checkpoint_number=checkpoint_number)
+        writer.wait()
+
+        checkpoint_state = tf.train.get_checkpoint_state(directory)
+        self.assertEqual(
+            [p[-6:] for p in checkpoint_state.all_model_checkpoint_paths],
+            ['ckpt-2', 'ckpt-3'],
+        )
+        self.assertEmpty(tf.io.gfile.glob(f'{directory}/ckpt-0.*'))
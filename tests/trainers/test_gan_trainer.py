@@ -0,0 +1,160 @@
+from unittest import mock
+
+import tensorflow as tf
+
+from gans.callbacks import callback
+from gans.utils import xla
+from tests.trainers import toy_trainer
+
+NUM_REPLICAS = 2
+
+
+class Interruption(Exception):
+    pass
+
+
+class InterruptingCallback(callback.Callback):
+
+    def __init__(self, every_n_steps):
+        self.every_n_steps = every_n_steps
+
+    def on_training_step_end(self, trainer):
+        raise Interruption
+
+
+class RecordingCallback(callback.Callback):
+
+    def __init__(self, every_n_steps=None):
+        self.every_n_steps = every_n_steps
+        self.recorded_steps = []
+
+    def on_training_step_end(self, trainer):
+        self.recorded_steps.append((trainer.global_step, int(trainer.generator_optimizer.iterations)))
+
+
+def failing_compilation(function, jit_compile):
+    def compiled_function(*args):
+        raise tf.errors.InvalidArgumentError(None, None, 'No registered XLA kernel.')
+    return compiled_function
+
+
+class TestStepsPerExecution(tf.test.TestCase):
+
+    def test_executions_run_their_steps_up_to_the_due_callbacks_and_the_epoch_end(self):
+        every_execution, every_3_steps = RecordingCallback(), RecordingCallback(every_n_steps=3)
+        trainer = toy_trainer.make_trainer(
+            self.get_temp_dir(),
+            steps_per_execution=2,
+            callbacks=[every_execution, every_3_steps],
+        )
+
+        trainer.train(toy_trainer.make_dataset(num_batches=5), num_epochs=1)
+
+        # Each recorded step is the global step and the number of generator updates after an execution.
+        self.assertEqual(every_execution.recorded_steps, [(2, 2), (3, 3), (5, 5)])
+        self.assertEqual(every_3_steps.recorded_steps, [(3, 3)])
+
+
+class TestXLAFallback(tf.test.TestCase):
+
+    def test_fallback_does_not_skip_the_batch_of_the_failed_compilation(self):
+        with mock.patch.object(xla, 'compile_function', failing_compilation):
+            trainer = toy_trainer.make_trainer(self.get_temp_dir(), jit_compile=True, steps_per_execution=3)
+
+        trainer.train(toy_trainer.make_dataset(num_batches=3), num_epochs=1)
+
+        self.assertFalse(trainer.train_function.jit_compile)
+        self.assertEqual(trainer.global_step, 3)
+        self.assertEqual(int(trainer.generator_optimizer.iterations), 3)
+
+
+class TestGradientAccumulation(tf.test.TestCase):
+
+    def test_accumulated_gradients_equal_the_batch_gradients(self):
+        trainer = toy_trainer.make_trainer(self.get_temp_dir(), gradient_accumulation_steps=3)
+        discriminator = trainer.discriminator
+        objectives = {'discriminator_loss': (discriminator, trainer.discriminator_optimizer)}
+        batch = tf.random.normal([8, toy_trainer.NUM_FEATURES])
+
+        def compute_losses(examples):
+            return {'discriminator_loss': tf.reduce_mean(tf.square(discriminator(examples, training=True)))}
+
+        expected_losses, expected_gradients = trainer.compute_gradients(compute_losses, batch, objectives)
+        # The micro-batches have 2, 2 and 4 examples.
+        losses, gradients = trainer.accumulate_gradients(compute_losses, batch, objectives)
+
+        self.assertAllClose(losses, expected_losses)
+        for expected, actual in zip(expected_gradients['discriminator_loss'], gradients['discriminator_loss']):
+            self.assertAllClose(actual, expected)
+
+
+class TestMirroredStrategy(tf.test.TestCase):
+
+    def test_train_steps_keep_the_replicas_in_sync(self):
+        logical_devices = tf.config.experimental.list_logical_devices('CPU')
+        if len(logical_devices) < NUM_REPLICAS:
+            self.skipTest('The logical CPU devices are created by tests/conftest.py.')
+        strategy = tf.distribute.MirroredStrategy(
+            devices=[device.name for device in logical_devices[:NUM_REPLICAS]],
+        )
+        trainer = toy_trainer.make_trainer(self.get_temp_dir(), strategy=strategy)
+        iterator = trainer.make_iterator(toy_trainer.make_dataset(num_batches=3, batch_size=4))
+
+        single_step_losses = trainer.train_steps(iterator, num_steps=1)
+        multi_step_losses = trainer.train_steps(iterator, num_steps=2)
+
+        self.assertEqual(int(trainer.generator_optimizer.iterations), 3)
+        for losses in [single_step_losses, multi_step_losses]:
+            self.assertEqual(set(losses), {'generator_loss', 'discriminator_loss'})
+            self.assertTrue(all(tf.math.is_finite(loss) for loss in losses.values()))
+        for variable in trainer.generator.trainable_variables + trainer.discriminator.trainable_variables:
+            first_replica_value, *other_replicas_values = strategy.experimental_local_results(variable)
+            for value in other_replicas_values:
+                self.assertAllClose(value, first_replica_value)
+
+
+class TestResumedTraining(tf.test.TestCase):
+
+    def interrupt_training(self, save_dir, dataset):
+        trainer = toy_trainer.make_trainer(
+            save_dir,
+            save_model_every_n_step=2,
+            save_iterator=True,
+            callbacks=[InterruptingCallback(every_n_steps=3)],
+        )
+        with self.assertRaises(Interruption):
+            trainer.train(dataset, num_epochs=1)
+
+    def test_resumed_epoch_continues_with_the_next_batch(self):
+        save_dir = self.get_temp_dir()
+        dataset = toy_trainer.make_dataset(num_batches=6)
+        self.interrupt_training(save_dir, dataset)
+
+        trainer = toy_trainer.make_trainer(save_dir, continue_training=True, save_iterator=True)
+        trainer.checkpoint_manager.regenerate_training(trainer)
+        iterator = trainer.make_iterator(dataset)
+
+        self.assertEqual((trainer.global_step, trainer.epoch, trainer.epoch_step), (2, 0, 2))
+        self.assertAllEqual(next(iterator), [[4.0, 4.0], [5.0, 5.0]])
+
+    def test_resumed_epoch_runs_its_remaining_steps(self):
+        save_dir = self.get_temp_dir()
+        dataset = toy_trainer.make_dataset(num_batches=6)
+        self.interrupt_training(save_dir, dataset)
+
+        trainer = toy_trainer.make_trainer(save_dir, continue_training=True, save_iterator=True)
+        trainer.train(dataset, num_epochs=1)
+
+        self.assertEqual(trainer.global_step, 6)
+        self.assertEqual(int(trainer.generator_optimizer.iterations), 6)
+
+    def test_num_epochs_counts_the_epochs_before_resuming(self):
+        save_dir = self.get_temp_dir()
+        dataset = toy_trainer.make_dataset(num_batches=3)
+        toy_trainer.make_trainer(save_dir).train(dataset, num_epochs=1)
+
+        trainer = toy_trainer.make_trainer(save_dir, continue_training=True)
+        trainer.train(dataset, num_epochs=2)
+
+        self.assertEqual(trainer.global_step, 6)
+        self.assertEqual(int(trainer.checkpoint_manager.epoch), 2)
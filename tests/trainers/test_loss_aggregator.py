@@ -0,0 +1,41 @@
+import tensorflow as tf
+
+from gans.trainers import loss_aggregator
+
+
+class TestLossAggregator(tf.test.TestCase):
+
+    def test_flush_returns_means_minima_and_maxima_of_the_steps(self):
+        aggregator = loss_aggregator.LossAggregator()
+
+        @tf.function
+        def train_steps():
+            for loss in [1.0, 4.0, 4.0]:
+                aggregator.update({'generator_loss': tf.constant(loss)})
+
+        train_steps()
+
+        self.assertAllClose(
+            aggregator.flush(),
+            {
+                'generator_loss':     3.0,
+                'generator_loss_min': 1.0,
+                'generator_loss_max': 4.0,
+            },
+        )
+
+    def test_flush_resets_the_aggregates(self):
+        aggregator = loss_aggregator.LossAggregator()
+        aggregator.update({'generator_loss': tf.constant(1.0)})
+        aggregator.flush()
+
+        self.assertEqual(aggregator.flush(), {})
+        aggregator.update({'generator_loss': tf.constant(2.0)})
+        self.assertAllClose(
+            aggregator.flush(),
+            {
+                'generator_loss':     2.0,
+                'generator_loss_min': 2.0,
+                'generator_loss_max': 2.0,
+            },
+        )
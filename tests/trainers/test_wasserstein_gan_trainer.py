@@ -0,0 +1,90 @@
+import tensorflow as tf
+
+from tests.trainers import toy_trainer
+
+SEED = 0
+
+
+def make_image_dataset(num_examples, drop_remainder=False):
+    return tf.data.Dataset.range(
+        num_examples,
+    ).map(
+        lambda i: tf.fill(toy_trainer.IMAGE_SHAPE, tf.cast(i, tf.float32)),
+    ).batch(
+        2,
+        drop_remainder=drop_remainder,
+    )
+
+
+class TestWassersteinGANTrainer(tf.test.TestCase):
+
+    def test_fused_discriminator_losses_equal_separate_losses(self):
+        trainer = toy_trainer.make_wasserstein_trainer(self.get_temp_dir())
+        real_examples = tf.random.normal([4] + toy_trainer.IMAGE_SHAPE)
+        objectives = {'discriminator_loss': (trainer.discriminator, trainer.discriminator_optimizer)}
+
+        # Both functions draw the generator inputs and then the interpolation weights.
+        tf.random.set_seed(SEED)
+        expected_losses, expected_gradients = trainer.compute_gradients(
+            trainer.compute_discriminator_losses,
+            real_examples,
+            objectives,
+        )
+        tf.random.set_seed(SEED)
+        fused_losses, fused_gradients = trainer.compute_gradients(
+            trainer.compute_fused_discriminator_losses,
+            real_examples,
+            objectives,
+        )
+
+        self.assertAllClose(fused_losses['discriminator_loss'], expected_losses['discriminator_loss'])
+        self.assertAllClose(fused_losses['gradient_penalty'], expected_losses['gradient_penalty'])
+        for expected, actual in zip(expected_gradients['discriminator_loss'], fused_gradients['discriminator_loss']):
+            self.assertAllClose(actual, expected)
+
+    def test_batches_are_grouped_along_the_second_axis(self):
+        trainer = toy_trainer.make_wasserstein_trainer(self.get_temp_dir(), n_critic=2)
+        dataset = make_image_dataset(num_examples=8, drop_remainder=True)
+
+        groups = list(trainer.prepare_train_dataset(dataset))
+
+        self.assertLen(groups, 2)
+        self.assertEqual(groups[0].shape, [2, 2] + toy_trainer.IMAGE_SHAPE)
+        self.assertAllEqual(groups[1][:, :, 0, 0, 0], [[4.0, 6.0], [5.0, 7.0]])
+
+    def test_incomplete_last_batch_is_dropped_with_a_known_number_of_groups(self):
+        trainer = toy_trainer.make_wasserstein_trainer(self.get_temp_dir(), n_critic=2)
+        dataset = make_image_dataset(num_examples=9)
+
+        grouped_dataset = trainer.prepare_train_dataset(dataset)
+
+        self.assertEqual(int(tf.data.experimental.cardinality(grouped_dataset)), 2)
+        self.assertLen(list(grouped_dataset), 2)
+
+    def test_repeated_dataset_stays_infinite(self):
+        trainer = toy_trainer.make_wasserstein_trainer(self.get_temp_dir(), n_critic=2)
+        dataset = make_image_dataset(num_examples=6).repeat()
+
+        grouped_dataset = trainer.prepare_train_dataset(dataset)
+
+        self.assertEqual(
+            int(tf.data.experimental.cardinality(grouped_dataset)),
+            tf.data.experimental.INFINITE_CARDINALITY,
+        )
+
+    def test_traced_train_steps_update_the_critic_n_critic_times_per_step(self):
+        for fuse_discriminator_passes in [False, True]:
+            trainer = toy_trainer.make_wasserstein_trainer(
+                self.get_temp_dir(),
+                n_critic=3,
+                fuse_discriminator_passes=fuse_discriminator_passes,
+            )
+            # The last batch is incomplete, the 6 complete batches make 2 groups of `n_critic` batches.
+            dataset = make_image_dataset(num_examples=13)
+
+            losses = trainer.train_steps(trainer.make_iterator(dataset), num_steps=2)
+
+            self.assertEqual(set(losses), {'generator_loss', 'discriminator_loss', 'gradient_penalty'})
+            self.assertTrue(all(tf.math.is_finite(loss) for loss in losses.values()))
+            self.assertEqual(int(trainer.generator_optimizer.iterations), 2)
+            self.assertEqual(int(trainer.discriminator_optimizer.iterations), 6)
@@ -0,0 +1,103 @@
+from unittest import mock
+
+import tensorflow as tf
+from easydict import EasyDict as edict
+from tensorflow.python import keras
+
+from gans.models import model
+from gans.trainers import vanilla_gan_trainer
+from gans.trainers import wasserstein_gan_trainer
+from gans.utils import constants
+
+LATENT_SIZE = 3
+NUM_FEATURES = 2
+IMAGE_SHAPE = [2, 2, 1]
+
+
+class DenseModel(model.Model):
+
+    def define_model(self) -> keras.Model:
+        return keras.Sequential([
+            keras.layers.Dense(
+                units=self.model_parameters.num_outputs,
+                input_shape=[self.model_parameters.num_inputs],
+            ),
+        ])
+
+
+class ImageGenerator(model.Model):
+
+    def define_model(self) -> keras.Model:
+        return keras.Sequential([
+            keras.layers.Dense(units=4, input_shape=[LATENT_SIZE]),
+            keras.layers.Reshape(IMAGE_SHAPE),
+        ])
+
+
+class ImageCritic(model.Model):
+
+    def define_model(self) -> keras.Model:
+        return keras.Sequential([
+            keras.layers.Flatten(input_shape=IMAGE_SHAPE),
+            keras.layers.Dense(units=1),
+        ])
+
+
+def make_dataset(num_batches, batch_size=2):
+    """Batches of examples filled with their index, so the position of a batch can be read from its values."""
+    return tf.data.Dataset.range(
+        num_batches * batch_size,
+    ).map(
+        lambda i: tf.fill([NUM_FEATURES], tf.cast(i, tf.float32)),
+    ).batch(
+        batch_size,
+    )
+
+
+def make_trainer(save_dir, strategy=None, **kwargs):
+    """Builds a `VanillaGANTrainer` of single dense layers, saving its checkpoints and logs in `save_dir`."""
+    return build_trainer(
+        trainer_class=vanilla_gan_trainer.VanillaGANTrainer,
+        save_dir=save_dir,
+        build_generator=lambda: DenseModel(edict({'num_inputs': LATENT_SIZE, 'num_outputs': NUM_FEATURES})),
+        build_discriminator=lambda: DenseModel(edict({'num_inputs': NUM_FEATURES, 'num_outputs': 1})),
+        strategy=strategy,
+        **kwargs,
+    )
+
+
+def make_wasserstein_trainer(save_dir, strategy=None, **kwargs):
+    """Builds a `WassersteinGANTrainer` of images of shape `IMAGE_SHAPE`, saving its files in `save_dir`."""
+    return build_trainer(
+        trainer_class=wasserstein_gan_trainer.WassersteinGANTrainer,
+        save_dir=save_dir,
+        build_generator=ImageGenerator,
+        build_discriminator=ImageCritic,
+        strategy=strategy,
+        **kwargs,
+    )
+
+
+def build_trainer(trainer_class, save_dir, build_generator, build_discriminator, strategy=None, **kwargs):
+    strategy = strategy or tf.distribute.get_strategy()
+    kwargs = {
+        'batch_size':                2,
+        'continue_training':         False,
+        'save_images_every_n_steps': None,
+        'validation_dataset':        None,
+        **kwargs,
+    }
+    with strategy.scope():
+        generator = build_generator()
+        discriminator = build_discriminator()
+        with mock.patch.object(constants, 'SAVE_IMAGE_DIR', save_dir):
+            return trainer_class(
+                generator=generator,
+                discriminator=discriminator,
+                training_name='toy_gan',
+                generator_optimizer=tf.keras.optimizers.SGD(learning_rate=0.1),
+                discriminator_optimizer=tf.keras.optimizers.SGD(learning_rate=0.1),
+                latent_size=LATENT_SIZE,
+                strategy=strategy,
+                **kwargs,
+            )
@@ -0,0 +1,62 @@
+import os
+import threading
+
+import numpy as np
+import tensorflow as tf
+
+from gans.utils import visualization
+
+
+class TestImageGrid(tf.test.TestCase):
+
+    def test_images_are_tiled_row_by_row(self):
+        images = np.stack([np.full([2, 3, 1], i / 127.5 - 1.0, dtype=np.float32) for i in range(5)])
+
+        grid = visualization.image_grid(images)
+
+        self.assertEqual(grid.dtype, np.uint8)
+        self.assertEqual(grid.shape, (2 * 2, 3 * 3, 1))
+        self.assertAllEqual(grid[::2, ::3, 0], [[0, 1, 2], [3, 4, 0]])
+
+    def test_thumbnail_is_scaled(self):
+        images = np.zeros([4, 8, 8, 3], dtype=np.float32)
+
+        grid = visualization.image_grid(images, scale=0.5)
+
+        self.assertEqual(grid.shape, (8, 8, 3))
+        self.assertAllEqual(grid, np.full([8, 8, 3], 128, dtype=np.uint8))
+
+    def test_encoded_grid_decodes_to_the_same_pixels(self):
+        images = np.random.uniform(-1.0, 1.0, size=[4, 5, 5, 3]).astype(np.float32)
+
+        grid = visualization.image_grid(images)
+        decoded_grid = tf.io.decode_png(visualization.encode_png(grid))
+
+        self.assertAllEqual(decoded_grid, grid)
+
+    def test_grids_of_several_generators_are_saved_separately(self):
+        save_path = self.get_temp_dir()
+        for name in ['generator_f_image', 'generator_g_image']:
+            visualization.save_image_grid(np.zeros([4, 2, 2, 3]), save_path, step=5, num_examples_to_display=4, name=name)
+
+        self.assertTrue(os.path.exists(os.path.join(save_path, 'generator_f_image_at_epoch_0005.png')))
+        self.assertTrue(os.path.exists(os.path.join(save_path, 'generator_g_image_at_epoch_0005.png')))
+
+
+class TestFunctionPlot(tf.test.TestCase):
+
+    def test_plot_is_saved_from_a_background_thread(self):
+        predictions = np.random.uniform(-1.0, 1.0, size=[16, 2]).astype(np.float32)
+        save_path = self.get_temp_dir()
+        plots = []
+
+        thread = threading.Thread(
+            target=lambda: plots.append(visualization.save_function_plot(predictions, save_path, step=3)),
+        )
+        thread.start()
+        thread.join()
+
+        self.assertEqual(len(plots), 1)
+        self.assertEqual(plots[0].dtype, np.uint8)
+        self.assertEqual(plots[0].shape[-1], 4)
+        self.assertTrue(os.path.exists(os.path.join(save_path, 'image_at_epoch_0003.png')))
@@ -0,0 +1,35 @@
+import tensorflow as tf
+
+from gans.utils import xla
+
+
+def failing_compilation(x):
+    raise tf.errors.InvalidArgumentError(None, None, 'No registered XLA kernel.')
+
+
+class TestFunctionWithFallback(tf.test.TestCase):
+
+    def test_fallback_runs_on_the_same_arguments(self):
+        calls = []
+
+        def build_function(jit_compile):
+            if jit_compile:
+                return failing_compilation
+            return lambda x: calls.append(x) or x + 1
+
+        function = xla.FunctionWithFallback(build_function=build_function, jit_compile=True, name='test')
+
+        self.assertEqual(function(1), 2)
+        self.assertEqual(calls, [1])
+        self.assertTrue(function.verified)
+        self.assertFalse(function.jit_compile)
+
+    def test_compiled_function_is_kept_when_it_compiles(self):
+        function = xla.FunctionWithFallback(
+            build_function=lambda jit_compile: (lambda x: x * 2) if jit_compile else failing_compilation,
+            jit_compile=True,
+            name='test',
+        )
+
+        self.assertEqual(function(3), 6)
+        self.assertTrue(function.jit_compile)